@@ -5,3 +5,25 @@ ENVIRONMENT = config('ENVIRONMENT', default='development')
 PORT = config('PORT', cast=int, default=8000)
 CORS_ORIGINS = config('CORS_ORIGINS', default='http://localhost:5173')
 DB_FILE = config('DB_FILE', default='data.db')
+SCHEMA_MANIFEST = config('SCHEMA_MANIFEST', default='schema.json')
+DB_READ_ONLY = config('DB_READ_ONLY', cast=bool, default=False)
+DB_WATCH_INTERVAL = config('DB_WATCH_INTERVAL', cast=float, default=5.0)
+SNAPSHOT_DIR = config('SNAPSHOT_DIR', default='snapshots')
+SNAPSHOT_RETAIN = config('SNAPSHOT_RETAIN', cast=int, default=3)
+SNAPSHOT_CHECK_INTERVAL = config('SNAPSHOT_CHECK_INTERVAL', cast=float, default=1.0)
+ADMIN_TOKEN = config('ADMIN_TOKEN', default=None)
+PROFILE_DIR = config('PROFILE_DIR', default='profiles')
+PROFILE_SAMPLE_RATE = config('PROFILE_SAMPLE_RATE', cast=float, default=0.0)
+PROFILE_RETAIN = config('PROFILE_RETAIN', cast=int, default=200)
+PROFILE_CPROFILE = config('PROFILE_CPROFILE', cast=bool, default=True)
+WORKERS = config('WORKERS', cast=int, default=0)
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', cast=int, default=1024)
+COMPRESSION_CACHE_SIZE = config('COMPRESSION_CACHE_SIZE', cast=int, default=32 * 1024 * 1024)
+MAX_PAGE_SIZE = config('MAX_PAGE_SIZE', cast=int, default=1000)
+ADMISSION_CHEAP_LIMIT = config('ADMISSION_CHEAP_LIMIT', cast=int, default=32)
+ADMISSION_CHEAP_QUEUE = config('ADMISSION_CHEAP_QUEUE', cast=int, default=64)
+ADMISSION_EXPENSIVE_LIMIT = config('ADMISSION_EXPENSIVE_LIMIT', cast=int, default=4)
+ADMISSION_EXPENSIVE_QUEUE = config('ADMISSION_EXPENSIVE_QUEUE', cast=int, default=8)
+ADMISSION_QUEUE_TIMEOUT = config('ADMISSION_QUEUE_TIMEOUT', cast=float, default=5.0)
+STREAM_POLL_INTERVAL = config('STREAM_POLL_INTERVAL', cast=float, default=1.0)
+STREAM_HEARTBEAT = config('STREAM_HEARTBEAT', cast=float, default=15.0)
@@ -1,18 +1,62 @@
+import os
 import sqlite3
+import threading
 from contextlib import contextmanager
+from pathlib import Path
+
+from esm_fullstack_challenge.db.partitions import attach_partitions
 
 
 class DB:
     """Database class for managing SQLite connections."""
-    def __init__(self, db_file: str):
+    def __init__(self, db_file: str, read_only: bool = False):
         self.db_file = db_file
+        self.read_only = read_only
+        self._local = threading.local()
+
+    def connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        """Opens a new connection, in read-only mode if requested, with any
+        partitions of the database attached.
+        """
+        if self.read_only:
+            uri = Path(self.db_file).absolute().as_uri() + '?mode=ro'
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=check_same_thread)
+        else:
+            conn = sqlite3.connect(self.db_file, check_same_thread=check_same_thread)
+        try:
+            attach_partitions(conn, self.db_file, self.read_only)
+        except Exception:
+            conn.close()
+            raise
+        return conn
 
     @contextmanager
     def get_connection(self):
-        """Context manager for database connection."""
-        conn = sqlite3.connect("data.db")
+        """Context manager for database connection.
+
+        Each thread keeps its connection open and reuses it, so partitions are
+        attached once per thread rather than for every request. A nested call
+        in the same thread gets a connection of its own.
+        """
+        local = self._local
+        pooled = not getattr(local, 'in_use', False)
+        if pooled:
+            if getattr(local, 'pid', None) != os.getpid():
+                # Never reuse a connection inherited from the parent of a forked process.
+                local.conn, local.pid = self.connect(), os.getpid()
+            conn = local.conn
+            conn.row_factory = None
+            local.in_use = True
+        else:
+            conn = self.connect()
         try:
             yield conn
             conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
         finally:
-            conn.close()
+            if pooled:
+                local.in_use = False
+            else:
+                conn.close()
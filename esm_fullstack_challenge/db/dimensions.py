@@ -0,0 +1,52 @@
+import sqlite3
+from typing import Dict
+
+from esm_fullstack_challenge.db.db import DB
+from esm_fullstack_challenge.db.snapshots import on_swap
+
+
+# Small reference tables that are read on almost every request but rarely change.
+DIMENSION_TABLES = ('circuits', 'constructors', 'status')
+
+_dimensions: Dict[str, Dict[int, dict]] = {}
+
+
+@on_swap
+def load_dimensions(db: DB) -> Dict[str, Dict[int, dict]]:
+    """(Re)loads all dimension tables into memory.
+
+    Called once in the server's master process before workers are forked so
+    every worker shares the same pages copy-on-write, and again whenever the
+    database snapshot is swapped.
+
+    Args:
+        db (DB): Database to read from.
+
+    Returns:
+        Dict[str, Dict[int, dict]]: Mapping of table name to rows keyed by id.
+    """
+    loaded = {}
+    with db.get_connection() as conn:
+        conn.row_factory = sqlite3.Row
+        for table in DIMENSION_TABLES:
+            rows = conn.execute(f'SELECT * FROM {table};').fetchall()
+            loaded[table] = {row['id']: dict(row) for row in rows}
+
+    _dimensions.clear()
+    _dimensions.update(loaded)
+    return _dimensions
+
+
+def get_dimension(table: str, db: DB) -> Dict[int, dict]:
+    """Gets the in-memory rows of a dimension table, loading them if needed.
+
+    Args:
+        table (str): Dimension table name.
+        db (DB): Database used if the dimensions have not been loaded yet.
+
+    Returns:
+        Dict[int, dict]: Rows keyed by id.
+    """
+    if table not in _dimensions:
+        load_dimensions(db)
+    return _dimensions[table]
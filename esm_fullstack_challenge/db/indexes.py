@@ -0,0 +1,45 @@
+import sqlite3
+from typing import List, Tuple
+
+
+# (table, columns) of the indexes backing the most common filters and joins.
+INDEXES: List[Tuple[str, List[str]]] = [
+    ('races', ['year', 'round']),
+    ('races', ['circuit_id']),
+    ('races', ['date']),
+    ('drivers', ['surname']),
+    ('drivers', ['nationality']),
+    ('constructors', ['name']),
+    ('circuits', ['name']),
+    ('results', ['race_id']),
+    ('results', ['driver_id']),
+    ('results', ['constructor_id']),
+    ('qualifying', ['race_id']),
+    ('qualifying', ['driver_id']),
+    ('lap_times', ['race_id', 'driver_id', 'lap']),
+    ('lap_times', ['driver_id']),
+    ('pit_stops', ['race_id', 'driver_id']),
+    ('driver_standings', ['race_id']),
+    ('driver_standings', ['driver_id']),
+    ('constructor_standings', ['race_id']),
+    ('constructor_standings', ['constructor_id']),
+    ('constructor_results', ['race_id']),
+]
+
+
+def create_indexes(conn: sqlite3.Connection):
+    """Creates the INDEXES whose table and columns exist and refreshes the planner statistics.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection.
+    """
+    cur = conn.cursor()
+    for table, columns in INDEXES:
+        cur.execute(f'PRAGMA table_info({table});')
+        if not set(columns) <= {row[1] for row in cur.fetchall()}:
+            continue
+        cur.execute(
+            f'CREATE INDEX IF NOT EXISTS idx_{table}_{"_".join(columns)} '
+            f'ON {table} ({", ".join(columns)});'
+        )
+    cur.execute('ANALYZE;')
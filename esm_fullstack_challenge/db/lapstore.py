@@ -0,0 +1,200 @@
+import os
+import shutil
+import sqlite3
+from typing import Dict, Iterable, Set
+
+import numpy as np
+
+from esm_fullstack_challenge.db.db import DB
+from esm_fullstack_challenge.db.partitions import partition_source
+from esm_fullstack_challenge.db.snapshots import on_swap
+from esm_fullstack_challenge.db.utils import sidecar_path
+
+
+LAP_STORE_SUFFIX = '.laps'
+
+# Exported lap_times columns, in sort order; race_id is implied by the offsets index.
+LAP_COLUMNS = ('driver_id', 'lap', 'position', 'milliseconds')
+
+# Races whose lap_times changed since the store was exported, kept by triggers.
+CHANGED_TABLE = '_lap_store_changed'
+
+_stores: Dict[tuple, 'LapStore'] = {}
+
+
+def export_lap_store(conn: sqlite3.Connection, db_file: str) -> str:
+    """Exports `lap_times` to a columnar store next to `db_file`.
+
+    Every column is written to its own .npy file with rows sorted by race,
+    driver and lap, along with the sorted race ids and the offset of each
+    race's first row. The directory is written under a temporary name and
+    renamed into place, so readers never see a partial store. Triggers record
+    races whose laps are written afterwards in CHANGED_TABLE.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the database being exported.
+        db_file (str): Database file the store belongs to.
+
+    Returns:
+        str: Directory of the store.
+    """
+    directory = sidecar_path(db_file, LAP_STORE_SUFFIX)
+    count = conn.execute('SELECT count(*) FROM lap_times;').fetchone()[0]
+    cur = conn.execute(
+        'SELECT race_id, ' + ', '.join(f'coalesce({c}, -1)' for c in LAP_COLUMNS)
+        + ' FROM lap_times ORDER BY race_id, driver_id, lap;'
+    )
+    dtype = [('race_id', np.int32)] + [(c, np.int32) for c in LAP_COLUMNS]
+    laps = np.fromiter(map(tuple, cur), dtype=dtype, count=count)
+
+    race_ids, starts = np.unique(laps['race_id'], return_index=True)
+    offsets = np.append(starts, len(laps)).astype(np.int64)
+
+    tmp_dir = f'{directory}.{os.getpid()}.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, 'race_ids.npy'), race_ids)
+    np.save(os.path.join(tmp_dir, 'offsets.npy'), offsets)
+    for column in LAP_COLUMNS:
+        np.save(os.path.join(tmp_dir, f'{column}.npy'), np.ascontiguousarray(laps[column]))
+    shutil.rmtree(directory, ignore_errors=True)
+    os.rename(tmp_dir, directory)
+    create_change_tracking(conn)
+    conn.execute(f'DELETE FROM {CHANGED_TABLE};')
+    conn.commit()
+    return directory
+
+
+def create_change_tracking(conn: sqlite3.Connection):
+    """Creates CHANGED_TABLE and the triggers marking races whose lap_times are written."""
+    conn.executescript(f"""
+        CREATE TABLE IF NOT EXISTS {CHANGED_TABLE} (race_id INTEGER PRIMARY KEY);
+
+        DROP TRIGGER IF EXISTS {CHANGED_TABLE}_ai;
+        CREATE TRIGGER {CHANGED_TABLE}_ai AFTER INSERT ON lap_times BEGIN
+            INSERT OR IGNORE INTO {CHANGED_TABLE} (race_id) VALUES (new.race_id);
+        END;
+        DROP TRIGGER IF EXISTS {CHANGED_TABLE}_au;
+        CREATE TRIGGER {CHANGED_TABLE}_au AFTER UPDATE ON lap_times BEGIN
+            INSERT OR IGNORE INTO {CHANGED_TABLE} (race_id) VALUES (old.race_id), (new.race_id);
+        END;
+        DROP TRIGGER IF EXISTS {CHANGED_TABLE}_ad;
+        CREATE TRIGGER {CHANGED_TABLE}_ad AFTER DELETE ON lap_times BEGIN
+            INSERT OR IGNORE INTO {CHANGED_TABLE} (race_id) VALUES (old.race_id);
+        END;
+    """)
+
+
+class LapStore:
+    """Read-only, memory-mapped view of an exported lap store.
+
+    Column files are mapped rather than read, so all workers share the same
+    pages through the OS cache and slicing a race copies nothing.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.race_ids = np.load(os.path.join(directory, 'race_ids.npy'))
+        self.offsets = np.load(os.path.join(directory, 'offsets.npy'))
+        self.columns = {
+            column: np.load(os.path.join(directory, f'{column}.npy'), mmap_mode='r')
+            for column in LAP_COLUMNS
+        }
+
+    def has_race(self, race_id: int) -> bool:
+        i = np.searchsorted(self.race_ids, race_id)
+        return bool(i < len(self.race_ids) and self.race_ids[i] == race_id)
+
+    def race_laps(self, race_id: int) -> Dict[str, np.ndarray]:
+        """Gets a race's laps as views of the mapped columns, sorted by driver and lap."""
+        i = np.searchsorted(self.race_ids, race_id)
+        if i == len(self.race_ids) or self.race_ids[i] != race_id:
+            start = end = 0
+        else:
+            start, end = self.offsets[i], self.offsets[i + 1]
+        return {column: values[start:end] for column, values in self.columns.items()}
+
+
+def get_lap_store(db: DB) -> LapStore | None:
+    """Gets the lap store exported for a database, if there is one.
+
+    Args:
+        db (DB): Database the store belongs to.
+
+    Returns:
+        LapStore | None: The store, or None if it was never exported.
+    """
+    directory = sidecar_path(db.db_file, LAP_STORE_SUFFIX)
+    try:
+        key = (directory, os.stat(os.path.join(directory, 'offsets.npy')).st_mtime_ns)
+    except FileNotFoundError:
+        return None
+    if key not in _stores:
+        _stores[key] = LapStore(directory)
+    return _stores[key]
+
+
+@on_swap
+def clear_lap_stores(db: DB):
+    """Drops stores of previous snapshots so their files can be unmapped."""
+    _stores.clear()
+
+
+def stored_races(conn: sqlite3.Connection, store: LapStore | None, race_ids: Iterable[int]) -> Set[int]:
+    """Races whose laps can be read from the store: exported, and unchanged since.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection.
+        store (LapStore | None): Lap store.
+        race_ids (Iterable[int]): Races being read.
+
+    Returns:
+        Set[int]: Races to read from the store; the others must be read from SQLite.
+    """
+    if store is None:
+        return set()
+    race_ids = [race_id for race_id in race_ids if store.has_race(race_id)]
+    if not race_ids:
+        return set()
+    try:
+        changed = {
+            row[0] for row in conn.execute(
+                f"SELECT race_id FROM {CHANGED_TABLE} WHERE race_id IN ({','.join('?' * len(race_ids))});",
+                race_ids
+            ).fetchall()
+        }
+    except sqlite3.OperationalError:
+        # Exported before changes were tracked.
+        changed = set()
+    return set(race_ids) - changed
+
+
+def read_race_laps(
+    conn: sqlite3.Connection,
+    race_id: int,
+    store: LapStore | None = None,
+    columns: Iterable[str] = LAP_COLUMNS,
+) -> Dict[str, np.ndarray]:
+    """Gets a race's laps as arrays, from the lap store if given and it holds
+    the race unchanged, or else from SQLite.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection, used without a store.
+        race_id (int): Race id.
+        store (LapStore | None, optional): Lap store. Defaults to None.
+        columns (Iterable[str], optional): Columns to read. Defaults to LAP_COLUMNS.
+
+    Returns:
+        Dict[str, np.ndarray]: Column arrays sorted by driver and lap.
+    """
+    columns = list(columns)
+    if race_id in stored_races(conn, store, [race_id]):
+        laps = store.race_laps(race_id)
+        return {column: laps[column] for column in columns}
+    cur = conn.execute(
+        'SELECT ' + ', '.join(f'coalesce({c}, -1)' for c in columns)
+        + f" FROM {partition_source(conn, 'lap_times', race_ids=[race_id])}"
+        + ' WHERE race_id = ? ORDER BY driver_id, lap;',
+        (race_id,)
+    )
+    rows = np.array(cur.fetchall(), dtype=np.int64).reshape(-1, len(columns))
+    return {column: rows[:, i] for i, column in enumerate(columns)}
@@ -0,0 +1,258 @@
+import os
+import re
+import sqlite3
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+from esm_fullstack_challenge.db.indexes import create_indexes
+from esm_fullstack_challenge.db.utils import sidecar_path
+
+
+# Fact tables stored in one database file per decade. The main database keeps
+# an empty table of the same schema for each, which connections shadow with a
+# TEMP view over all partitions. Inside a partition the tables are suffixed
+# with its name (results_p2010) so the views' INSTEAD OF triggers, which may
+# only write to unqualified tables, can address each of them.
+PARTITIONED_TABLES = ('lap_times', 'pit_stops', 'results')
+
+PARTITIONS_TABLE = '_partitions'
+
+PARTITION_YEARS = 10
+
+_AFTER_TRIGGER = re.compile(
+    r'CREATE\s+TRIGGER\s.*?\bAFTER\s+(?P<event>INSERT|UPDATE|DELETE)\b.*?\bBEGIN\b(?P<body>.*)\bEND\s*;?\s*$',
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def partition_name(year: int) -> str:
+    """Schema name of the partition holding a season, e.g. p2010."""
+    return f'p{year - year % PARTITION_YEARS}'
+
+
+def partition_table(name: str, table: str) -> str:
+    """Qualified name of a table in a partition, e.g. p2010.results_p2010."""
+    return f'{name}.{table}_{name}'
+
+
+def get_partitions(conn: sqlite3.Connection) -> List[Tuple[str, str, int, int]]:
+    """Gets the (name, file, min_year, max_year) of every partition, if the database is partitioned."""
+    try:
+        return conn.execute(
+            f'SELECT name, file, min_year, max_year FROM main.{PARTITIONS_TABLE} ORDER BY name;'
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return []
+
+
+def build_partitions(conn: sqlite3.Connection, db_file: str):
+    """Moves the rows of PARTITIONED_TABLES into one database file per decade.
+
+    Partition files are written next to `db_file` so they are versioned and
+    pruned with it, indexed and analyzed on their own, and registered in
+    `_partitions`. The main tables are emptied, without firing their triggers,
+    and the database vacuumed.
+
+    Args:
+        conn (sqlite3.Connection): Connection to `db_file`.
+        db_file (str): Database file being partitioned.
+    """
+    tables = [
+        table for table in PARTITIONED_TABLES
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?;", (table,)).fetchone()
+    ]
+    decades = [
+        row[0] for row in
+        conn.execute('SELECT DISTINCT year - year % ? FROM races ORDER BY 1;', (PARTITION_YEARS,)).fetchall()
+    ]
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {PARTITIONS_TABLE} (
+            name TEXT PRIMARY KEY,
+            file TEXT NOT NULL,
+            min_year INTEGER NOT NULL,
+            max_year INTEGER NOT NULL
+        );
+    """)
+    conn.execute(f'DELETE FROM {PARTITIONS_TABLE};')
+    conn.commit()
+
+    for start in decades:
+        name = partition_name(start)
+        end = start + PARTITION_YEARS - 1
+        path = sidecar_path(db_file, f'.{name}.sqlite')
+        if os.path.exists(path):
+            os.remove(path)
+
+        part = sqlite3.connect(path)
+        try:
+            part.execute('ATTACH DATABASE ? AS source;', (os.path.realpath(db_file),))
+            for table in tables:
+                create_sql = conn.execute(
+                    "SELECT sql FROM sqlite_master WHERE type='table' AND name=?;", (table,)
+                ).fetchone()[0]
+                part.execute(create_sql)
+                part.execute(
+                    f'INSERT INTO main.{table} SELECT * FROM source.{table} '
+                    'WHERE race_id IN (SELECT id FROM source.races WHERE year BETWEEN ? AND ?);',
+                    (start, end)
+                )
+            part.commit()
+            part.execute('DETACH DATABASE source;')
+            create_indexes(part)
+            for table in tables:
+                part.execute(f'ALTER TABLE {table} RENAME TO {table}_{name};')
+            part.execute('ANALYZE;')
+            part.commit()
+        finally:
+            part.close()
+        conn.execute(
+            f'INSERT INTO {PARTITIONS_TABLE} VALUES (?, ?, ?, ?);',
+            (name, os.path.basename(path), start, end)
+        )
+
+    # Moving the rows is not a change, so the triggers tracking changes are set aside meanwhile.
+    triggers = conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type='trigger' "
+        f"AND tbl_name IN ({','.join('?' * len(tables))});", tables
+    ).fetchall()
+    for trigger, _ in triggers:
+        conn.execute(f'DROP TRIGGER {trigger};')
+    for table in tables:
+        conn.execute(f'DELETE FROM {table};')
+    for _, sql in triggers:
+        conn.execute(sql)
+    conn.commit()
+    conn.execute('VACUUM;')
+
+
+def attach_partitions(conn: sqlite3.Connection, db_file: str, read_only: bool = False):
+    """Attaches the partitions of a database and creates TEMP views unifying them,
+    so queries on a partitioned table see all of its rows. Unless read-only, the
+    views get INSTEAD OF triggers routing writes to the partition of the row's
+    race and running the triggers of the main table. Does nothing if the
+    database is not partitioned.
+
+    Args:
+        conn (sqlite3.Connection): New connection to `db_file`.
+        db_file (str): Database file.
+        read_only (bool, optional): Attach the partitions read-only. Defaults to False.
+
+    Raises:
+        FileNotFoundError: A partition file is missing.
+    """
+    partitions = get_partitions(conn)
+    if not partitions:
+        return
+    directory = os.path.dirname(os.path.realpath(db_file))
+    for name, file, _, _ in partitions:
+        path = os.path.join(directory, file)
+        if not os.path.isfile(path):
+            # ATTACH would silently create an empty partition in its place.
+            raise FileNotFoundError(f'Partition {name} of {db_file} is missing: {path}')
+        conn.execute(
+            f'ATTACH DATABASE ? AS {name};',
+            (Path(path).as_uri() + '?mode=ro' if read_only else path,)
+        )
+    tables = [
+        row[0] for row in conn.execute(
+            "SELECT name FROM main.sqlite_master WHERE type='table' "
+            f"AND name IN ({','.join('?' * len(PARTITIONED_TABLES))});", PARTITIONED_TABLES
+        ).fetchall()
+    ]
+    for table in tables:
+        conn.execute(
+            f'CREATE TEMP VIEW IF NOT EXISTS {table} AS '
+            + ' UNION ALL '.join(f'SELECT * FROM {partition_table(name, table)}' for name, _, _, _ in partitions)
+        )
+        if not read_only:
+            _create_write_triggers(conn, table, partitions)
+
+
+def _create_write_triggers(conn: sqlite3.Connection, table: str, partitions: List[Tuple[str, str, int, int]]):
+    """Creates the INSTEAD OF triggers making the TEMP view of a partitioned table writable.
+
+    Rows are matched on all their columns, and moved between partitions when
+    an update changes their race's decade. The bodies of the main table's
+    AFTER triggers, e.g. those marking changed races, run after each write.
+    """
+    columns = [row[1] for row in conn.execute(f'PRAGMA main.table_info({table});').fetchall()]
+    column_list = ', '.join(columns)
+
+    def values(ref: str) -> str:
+        return ', '.join(f'{ref}.{column}' for column in columns)
+
+    def matches(ref: str) -> str:
+        return ' AND '.join(f'{column} IS {ref}.{column}' for column in columns)
+
+    def in_partition(ref: str, min_year: int, max_year: int) -> str:
+        return f'(SELECT year FROM races WHERE id = {ref}.race_id) BETWEEN {min_year} AND {max_year}'
+
+    check = (
+        f"SELECT RAISE(ABORT, 'no partition of {table} holds the race of this row') "
+        f'WHERE NOT EXISTS (SELECT 1 FROM {PARTITIONS_TABLE} p '
+        'WHERE (SELECT year FROM races WHERE id = new.race_id) BETWEEN p.min_year AND p.max_year);'
+    )
+    inserts, updates, deletes = [check], [check], []
+    for name, _, min_year, max_year in partitions:
+        target = f'{table}_{name}'
+        new_here, old_here = in_partition('new', min_year, max_year), in_partition('old', min_year, max_year)
+        inserts.append(f'INSERT INTO {target} ({column_list}) SELECT {values("new")} WHERE {new_here};')
+        updates += [
+            f'UPDATE {target} SET ({column_list}) = ({values("new")}) WHERE {matches("old")} AND {new_here};',
+            f'DELETE FROM {target} WHERE {matches("old")} AND NOT ({new_here});',
+            f'INSERT INTO {target} ({column_list}) SELECT {values("new")} WHERE {new_here} AND NOT ({old_here});',
+        ]
+        deletes.append(f'DELETE FROM {target} WHERE {matches("old")};')
+    by_event = {'INSERT': inserts, 'UPDATE': updates, 'DELETE': deletes}
+    for (sql,) in conn.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type='trigger' AND tbl_name=?;", (table,)).fetchall():
+        match = _AFTER_TRIGGER.match(sql)
+        if match:
+            by_event[match['event'].upper()].append(match['body'].strip())
+
+    for event, statements in by_event.items():
+        conn.execute(
+            f'CREATE TEMP TRIGGER IF NOT EXISTS {table}_instead_of_{event.lower()} '
+            f'INSTEAD OF {event} ON {table} BEGIN ' + ' '.join(statements) + ' END;'
+        )
+
+
+def partition_source(
+    conn: sqlite3.Connection,
+    table: str,
+    race_ids: Iterable[int] | None = None,
+    years: Iterable[int] | None = None,
+) -> str:
+    """FROM expression reading a table only from the partitions that can hold
+    the given races or seasons. Falls back to the table itself when the
+    database or table is not partitioned, or nothing narrows the search.
+
+    Args:
+        conn (sqlite3.Connection): Connection with the partitions attached.
+        table (str): Table name.
+        race_ids (Iterable[int] | None, optional): Races being queried. Defaults to None.
+        years (Iterable[int] | None, optional): Seasons being queried. Defaults to None.
+
+    Returns:
+        str: Table, partition table or union subquery to select from.
+    """
+    if table not in PARTITIONED_TABLES or (race_ids is None and years is None):
+        return table
+    partitions = get_partitions(conn)
+    if not partitions:
+        return table
+
+    years = set(years or [])
+    if race_ids is not None:
+        race_ids = list(race_ids)
+        years |= {
+            row[0] for row in conn.execute(
+                f"SELECT DISTINCT year FROM races WHERE id IN ({','.join('?' * len(race_ids))});", race_ids
+            ).fetchall()
+        }
+    names = [name for name, _, min_year, max_year in partitions if any(min_year <= y <= max_year for y in years)]
+    if not names:
+        return table
+    if len(names) == 1:
+        return partition_table(names[0], table)
+    return '(' + ' UNION ALL '.join(f'SELECT * FROM {partition_table(name, table)}' for name in names) + ')'
@@ -0,0 +1,110 @@
+import re
+import sqlite3
+from typing import Dict, List, Tuple
+
+
+# Columns covered by the full-text search index of each table.
+SEARCH_COLUMNS: Dict[str, List[str]] = {
+    'drivers': ['forename', 'surname', 'driver_ref', 'code', 'nationality'],
+    'constructors': ['name', 'constructor_ref', 'nationality'],
+    'circuits': ['name', 'circuit_ref', 'location', 'country'],
+}
+
+
+def get_search_table_name(table: str) -> str:
+    return f'_fts_{table}'
+
+
+def _document_expr(table: str, alias: str) -> str:
+    return " || ' ' || ".join(
+        f"coalesce({alias}.{col}, '')" for col in SEARCH_COLUMNS[table]
+    )
+
+
+def create_search_indexes(conn: sqlite3.Connection):
+    """(Re)builds the FTS5 search index of every searchable table, along with
+    the triggers that keep it in sync with inserts, updates and deletes.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection.
+    """
+    for table in SEARCH_COLUMNS:
+        fts = get_search_table_name(table)
+        conn.executescript(f"""
+            DROP TABLE IF EXISTS {fts};
+            CREATE VIRTUAL TABLE {fts} USING fts5(
+                document,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '1 2 3'
+            );
+            INSERT INTO {fts}(rowid, document)
+                SELECT id, {_document_expr(table, 't')} FROM {table} t;
+            INSERT INTO {fts}({fts}) VALUES ('optimize');
+
+            DROP TRIGGER IF EXISTS {fts}_ai;
+            CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, document) VALUES (new.id, {_document_expr(table, 'new')});
+            END;
+            DROP TRIGGER IF EXISTS {fts}_ad;
+            CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN
+                DELETE FROM {fts} WHERE rowid = old.id;
+            END;
+            DROP TRIGGER IF EXISTS {fts}_au;
+            CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN
+                DELETE FROM {fts} WHERE rowid = old.id;
+                INSERT INTO {fts}(rowid, document) VALUES (new.id, {_document_expr(table, 'new')});
+            END;
+        """)
+
+
+def has_search_index(conn: sqlite3.Connection, table: str) -> bool:
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?;",
+        (get_search_table_name(table),)
+    )
+    return cur.fetchone() is not None
+
+
+def get_search_terms(q: str) -> List[str]:
+    return re.findall(r'\w+', q)
+
+
+def search_query_parts(
+        conn: sqlite3.Connection,
+        table: str,
+        q: str,
+) -> Tuple[str, List[str] | None, str | None, List[str]]:
+    """Builds the parts of a ranked prefix search over a table, to be passed to
+    `query_builder`. Falls back to `like` matching when the table has no index.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection.
+        table (str): Name of a table in SEARCH_COLUMNS.
+        q (str): Search text, every word of which must prefix-match a word of the row.
+
+    Returns:
+        Tuple[str, List[str] | None, str | None, List[str]]: Table expression, columns,
+                                                             where clause and ranking order_by.
+    """
+    terms = get_search_terms(q)
+    if not terms:
+        return table, None, None, []
+
+    if not has_search_index(conn, table):
+        where = ' and '.join(
+            '(' + ' or '.join(
+                f"{col} like '%{term}%'" for col in SEARCH_COLUMNS[table]
+            ) + ')'
+            for term in terms
+        )
+        return table, [f'{table}.*'], where, []
+
+    fts = get_search_table_name(table)
+    match = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+    return (
+        f'{table} join {fts} on {fts}.rowid = {table}.id',
+        [f'{table}.*'],
+        "{} match '{}'".format(fts, match.replace("'", "''")),
+        [f'{fts}.rank'],
+    )
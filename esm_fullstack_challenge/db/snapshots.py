@@ -0,0 +1,176 @@
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from glob import glob
+from typing import Callable, Dict, List
+
+from esm_fullstack_challenge.db.db import DB
+from esm_fullstack_challenge.models.utils import load_schema_manifest
+
+
+logger = logging.getLogger('uvicorn.error')
+
+_swap_callbacks: List[Callable[[DB], None]] = []
+
+
+def on_swap(callback: Callable[[DB], None]) -> Callable[[DB], None]:
+    """Registers a function called with the new DB whenever the data file is swapped,
+    used to refresh caches derived from the data. Exceptions raised by it are logged.
+    """
+    _swap_callbacks.append(callback)
+    return callback
+
+
+def get_file_signature(db_file: str) -> tuple | None:
+    """Identity of the file `db_file` points to; changes when it is swapped."""
+    try:
+        real_path = os.path.realpath(db_file)
+        return real_path, os.stat(real_path).st_ino
+    except FileNotFoundError:
+        return None
+
+
+def new_snapshot_path(snapshot_dir: str) -> str:
+    """Path for a new, versioned snapshot file in `snapshot_dir`."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    return os.path.join(snapshot_dir, f'data-{version}.db')
+
+
+def publish_snapshot(snapshot_file: str, db_file: str, retain: int = 3):
+    """Atomically points `db_file` at a fully built snapshot.
+
+    `db_file` is replaced by a symlink to the snapshot with a single rename, so
+    readers see either the old or the new snapshot, never a partial one. Only the
+    `retain` most recent snapshots next to `snapshot_file` are kept.
+
+    Args:
+        snapshot_file (str): Path of the new snapshot, e.g. from `new_snapshot_path`.
+        db_file (str): Path the application reads the database from.
+        retain (int, optional): Number of snapshots to keep on disk. Defaults to 3.
+    """
+    conn = sqlite3.connect(snapshot_file)
+    try:
+        result = conn.execute('PRAGMA quick_check;').fetchone()[0]
+    finally:
+        conn.close()
+    if result != 'ok':
+        raise ValueError(f'Snapshot {snapshot_file} failed integrity check: {result}')
+
+    target = os.path.relpath(os.path.abspath(snapshot_file), os.path.dirname(os.path.abspath(db_file)))
+    tmp_link = f'{db_file}.{os.getpid()}.tmp'
+    os.symlink(target, tmp_link)
+    os.replace(tmp_link, db_file)
+
+    snapshot_dir = os.path.dirname(os.path.abspath(snapshot_file))
+    snapshots = sorted(glob(os.path.join(snapshot_dir, 'data-*.db')))
+    for old in snapshots[:-retain] if retain > 0 else []:
+        if os.path.abspath(old) != os.path.abspath(snapshot_file):
+            os.remove(old)
+            for sidecar in glob(os.path.splitext(old)[0] + '.*'):
+                shutil.rmtree(sidecar) if os.path.isdir(sidecar) else os.remove(sidecar)
+
+
+class Snapshot:
+    """A database file and the number of requests currently using it."""
+    def __init__(self, path: str, read_only: bool):
+        self.path = path
+        self.version = os.path.splitext(os.path.basename(path))[0]
+        self.db = DB(path, read_only=read_only)
+        self.active = 0
+
+    def as_dict(self) -> Dict:
+        return {'version': self.version, 'path': self.path, 'active_requests': self.active}
+
+
+class SnapshotManager:
+    """Tracks which snapshot `db_file` points to and hands it out to requests.
+
+    Requests keep the snapshot they started with until they finish, while new
+    requests use the newest one, so a swap never interrupts in-flight queries.
+    Swaps that change the schema are refused because the models and routes
+    generated at startup would no longer match; those require a restart.
+    """
+    def __init__(self, db_file: str, read_only: bool = False, check_interval: float = 1.0):
+        self.db_file = db_file
+        self.read_only = read_only
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._current: Snapshot | None = None
+        self._signature: tuple | None = None
+        self._schema: Dict | None = None
+        self._draining: List[Snapshot] = []
+        self._last_check = 0.0
+
+    def current(self) -> Snapshot:
+        now = time.monotonic()
+        if self._current is None or now - self._last_check >= self.check_interval:
+            self._last_check = now
+            self.refresh()
+        return self._current
+
+    def refresh(self) -> bool:
+        """Switches to the snapshot `db_file` currently points to, if it changed.
+
+        Returns:
+            bool: True if a new snapshot was activated.
+        """
+        signature = get_file_signature(self.db_file)
+        if self._current is not None and (signature is None or signature == self._signature):
+            return False
+
+        with self._lock:
+            if self._current is not None and signature == self._signature:
+                return False
+            path = signature[0] if signature else self.db_file
+            snapshot = Snapshot(path, self.read_only)
+            schema = load_schema_manifest(path) if signature else None
+            if self._current is not None and schema != self._schema:
+                logger.error(
+                    'Schema of %s differs from the running snapshot %s, restart required to use it',
+                    path, self._current.version
+                )
+                self._signature = signature
+                return False
+
+            previous = self._current
+            self._current, self._signature, self._schema = snapshot, signature, schema
+            if previous is not None:
+                logger.info('Swapped database snapshot %s -> %s', previous.version, snapshot.version)
+                self._draining.append(previous)
+            self._draining = [s for s in self._draining if s.active > 0]
+
+        if previous is not None:
+            for callback in _swap_callbacks:
+                # The swap has happened; a failing cache refresh must not fail the request that noticed it.
+                try:
+                    callback(snapshot.db)
+                except Exception:
+                    logger.exception('Swap callback %s failed for snapshot %s', callback.__name__, snapshot.version)
+        return True
+
+    @contextmanager
+    def acquire(self):
+        """Context manager yielding the DB of the current snapshot for one request."""
+        snapshot = self.current()
+        with self._lock:
+            snapshot.active += 1
+        try:
+            yield snapshot.db
+        finally:
+            with self._lock:
+                snapshot.active -= 1
+
+    def status(self) -> Dict:
+        with self._lock:
+            self._draining = [s for s in self._draining if s.active > 0]
+            return {
+                'db_file': self.db_file,
+                'current': self._current.as_dict() if self._current else None,
+                'draining': [s.as_dict() for s in self._draining],
+            }
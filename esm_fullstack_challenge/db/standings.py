@@ -0,0 +1,265 @@
+import sqlite3
+from typing import Dict, List
+
+
+# Championship standings maintained from `results`: name of the internal table
+# and the results column identifying the competitor.
+STANDINGS = {
+    'drivers': ('_driver_standings', 'driver_id'),
+    'constructors': ('_constructor_standings', 'constructor_id'),
+}
+
+DIRTY_TABLE = '_standings_dirty'
+
+_SEASON_STANDINGS_QUERY = """
+    with season_races as (
+        select id as race_id, round
+        from races
+        where year = :year and id in (select race_id from results)
+    ),
+    race_results as (
+        select r.race_id,
+            r.{entity_col}              as entity_id,
+            sum(r.points)               as points,
+            sum(r.position_order = 1)   as wins
+        from results r
+            join season_races sr on sr.race_id = r.race_id
+        group by r.race_id, r.{entity_col}
+    ),
+    entities as (
+        select rr.entity_id, min(sr.round) as first_round
+        from race_results rr
+            join season_races sr on sr.race_id = rr.race_id
+        group by rr.entity_id
+    ),
+    cumulative as (
+        select sr.race_id,
+            sr.round,
+            e.entity_id,
+            sum(coalesce(rr.points, 0)) over w  as points,
+            sum(coalesce(rr.wins, 0)) over w    as wins
+        from season_races sr
+            join entities e on sr.round >= e.first_round
+            left join race_results rr on rr.race_id = sr.race_id and rr.entity_id = e.entity_id
+        window w as (partition by e.entity_id order by sr.round rows unbounded preceding)
+    ),
+    finishes as (
+        select r.race_id,
+            r.{entity_col}      as entity_id,
+            r.position_order,
+            count(*)            as n
+        from results r
+            join season_races sr on sr.race_id = r.race_id
+        where r.position_order is not null
+        group by r.race_id, r.{entity_col}, r.position_order
+    ),
+    finish_counts as (
+        select c.race_id,
+            c.entity_id,
+            p.position_order,
+            sum(coalesce(f.n, 0)) over (
+                partition by c.entity_id, p.position_order order by c.round rows unbounded preceding
+            ) as n
+        from cumulative c
+            cross join (select distinct position_order from finishes) p
+            left join finishes f on f.race_id = c.race_id
+                and f.entity_id = c.entity_id
+                and f.position_order = p.position_order
+    ),
+    countback as (
+        select distinct race_id,
+            entity_id,
+            group_concat(printf('%04d', n), '') over (
+                partition by race_id, entity_id order by position_order
+                rows between unbounded preceding and unbounded following
+            ) as countback
+        from finish_counts
+    )
+    select c.race_id,
+        :year as year,
+        c.round,
+        c.entity_id,
+        c.points,
+        c.wins,
+        row_number() over (
+            partition by c.race_id order by c.points desc, cb.countback desc, c.entity_id
+        ) as position
+    from cumulative c
+        left join countback cb on cb.race_id = c.race_id and cb.entity_id = c.entity_id
+    where c.round >= :from_round
+"""
+
+
+def season_standings_query(kind: str) -> str:
+    """SQL computing the standings after every race of a season from `results`.
+
+    Points and wins are cumulated per season with window functions and ranked
+    per race by points, then by countback: the most wins, then second places,
+    and so on. The query takes :year and :from_round
+    parameters and returns (race_id, year, round, entity_id, points, wins, position).
+
+    Args:
+        kind (str): 'drivers' or 'constructors'.
+
+    Returns:
+        str: SQL query.
+    """
+    _, entity_col = STANDINGS[kind]
+    return _SEASON_STANDINGS_QUERY.format(entity_col=entity_col)
+
+
+def create_standings_tables(conn: sqlite3.Connection):
+    """Creates the standings tables and the triggers marking races whose results change."""
+    for table, entity_col in STANDINGS.values():
+        conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                race_id INTEGER NOT NULL,
+                year INTEGER NOT NULL,
+                round INTEGER NOT NULL,
+                {entity_col} INTEGER NOT NULL,
+                points REAL NOT NULL,
+                wins INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                PRIMARY KEY (race_id, {entity_col})
+            );
+            CREATE INDEX IF NOT EXISTS idx{table}_year_round ON {table} (year, round);
+        """)
+    conn.executescript(f"""
+        CREATE TABLE IF NOT EXISTS {DIRTY_TABLE} (race_id INTEGER PRIMARY KEY);
+
+        DROP TRIGGER IF EXISTS {DIRTY_TABLE}_ai;
+        CREATE TRIGGER {DIRTY_TABLE}_ai AFTER INSERT ON results BEGIN
+            INSERT OR IGNORE INTO {DIRTY_TABLE} (race_id) VALUES (new.race_id);
+        END;
+        DROP TRIGGER IF EXISTS {DIRTY_TABLE}_au;
+        CREATE TRIGGER {DIRTY_TABLE}_au AFTER UPDATE ON results BEGIN
+            INSERT OR IGNORE INTO {DIRTY_TABLE} (race_id) VALUES (old.race_id), (new.race_id);
+        END;
+        DROP TRIGGER IF EXISTS {DIRTY_TABLE}_ad;
+        CREATE TRIGGER {DIRTY_TABLE}_ad AFTER DELETE ON results BEGIN
+            INSERT OR IGNORE INTO {DIRTY_TABLE} (race_id) VALUES (old.race_id);
+        END;
+    """)
+
+
+def has_standings_tables(conn: sqlite3.Connection) -> bool:
+    cur = conn.cursor()
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?;", (DIRTY_TABLE,))
+    return cur.fetchone() is not None
+
+
+def update_season_standings(conn: sqlite3.Connection, year: int, from_round: int = 0):
+    """Recomputes the stored standings of a season from a given round onwards.
+
+    Earlier rounds are unaffected by a change in a later race's results, so
+    only the standings after `from_round` are rewritten.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection.
+        year (int): Season.
+        from_round (int, optional): First round to recompute. Defaults to 0.
+    """
+    params = {'year': year, 'from_round': from_round}
+    for kind, (table, entity_col) in STANDINGS.items():
+        conn.execute(f'DELETE FROM {table} WHERE year = :year AND round >= :from_round;', params)
+        conn.execute(
+            f'INSERT INTO {table} (race_id, year, round, {entity_col}, points, wins, position) '
+            + season_standings_query(kind),
+            params
+        )
+
+
+def update_race_standings(conn: sqlite3.Connection, race_id: int):
+    """Updates the standings after the results of a race were written.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection.
+        race_id (int): Race whose results changed.
+    """
+    row = conn.execute('SELECT year, round FROM races WHERE id = ?;', (race_id,)).fetchone()
+    if row:
+        update_season_standings(conn, row[0], row[1])
+    conn.execute(f'DELETE FROM {DIRTY_TABLE} WHERE race_id = ?;', (race_id,))
+
+
+def refresh_dirty_standings(conn: sqlite3.Connection, year: int | None = None):
+    """Recomputes the standings of every season (or just `year`) with changed results.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection.
+        year (int | None, optional): Only refresh this season. Defaults to None.
+    """
+    rows = conn.execute(f"""
+        SELECT ra.year, min(ra.round)
+        FROM {DIRTY_TABLE} d
+            JOIN races ra ON ra.id = d.race_id
+        {'WHERE ra.year = :year' if year is not None else ''}
+        GROUP BY ra.year;
+    """, {'year': year}).fetchall()
+    for dirty_year, from_round in rows:
+        update_season_standings(conn, dirty_year, from_round)
+        conn.execute(
+            f'DELETE FROM {DIRTY_TABLE} WHERE race_id IN (SELECT id FROM races WHERE year = ?);',
+            (dirty_year,)
+        )
+
+
+def build_standings(conn: sqlite3.Connection):
+    """Creates and fully computes the standings of every season.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection.
+    """
+    create_standings_tables(conn)
+    for table, _ in STANDINGS.values():
+        conn.execute(f'DELETE FROM {table};')
+    conn.execute(f'INSERT OR IGNORE INTO {DIRTY_TABLE} (race_id) SELECT DISTINCT race_id FROM results;')
+    refresh_dirty_standings(conn)
+
+
+def get_race_standings(conn: sqlite3.Connection, kind: str, race_id: int) -> List[Dict]:
+    """Gets the standings after a race.
+
+    Reads the maintained standings, bringing the race's season up to date
+    first if its results changed. On a read-only database, or one without
+    maintained standings, they are computed on the fly instead.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection.
+        kind (str): 'drivers' or 'constructors'.
+        race_id (int): Race id.
+
+    Returns:
+        List[Dict]: Rows with entity id, points, wins and position, ordered by position.
+    """
+    table, entity_col = STANDINGS[kind]
+    year, round_ = conn.execute('SELECT year, round FROM races WHERE id = ?;', (race_id,)).fetchone()
+
+    computed = not has_standings_tables(conn)
+    if not computed and conn.execute(
+            f'SELECT 1 FROM {DIRTY_TABLE} d JOIN races ra ON ra.id = d.race_id '
+            'WHERE ra.year = ? AND ra.round <= ? LIMIT 1;', (year, round_)).fetchone():
+        try:
+            refresh_dirty_standings(conn, year)
+            conn.commit()
+        except sqlite3.OperationalError:
+            conn.rollback()
+            computed = True
+
+    if computed:
+        query = (
+            f'SELECT entity_id AS {entity_col}, points, wins, position FROM ('
+            + season_standings_query(kind)
+            + ') WHERE race_id = :race_id ORDER BY position, points DESC;'
+        )
+        params = {'year': year, 'from_round': round_, 'race_id': race_id}
+    else:
+        query = (
+            f'SELECT {entity_col}, points, wins, position FROM {table} '
+            'WHERE race_id = :race_id ORDER BY position, points DESC;'
+        )
+        params = {'race_id': race_id}
+
+    cur = conn.execute(query, params)
+    keys = [d[0] for d in cur.description]
+    return [dict(zip(keys, row)) for row in cur.fetchall()]
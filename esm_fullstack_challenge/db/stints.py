@@ -0,0 +1,201 @@
+import sqlite3
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from esm_fullstack_challenge.db.lapstore import LapStore, stored_races
+from esm_fullstack_challenge.db.partitions import partition_source
+
+
+# Clean laps slower than this multiple of the race's median clean lap (safety
+# car, incidents) are left out of pace figures.
+SLOW_LAP_FACTOR = 1.1
+
+STINT_KEYS = [
+    'race_id', 'driver_id', 'stint', 'start_lap', 'end_lap', 'laps', 'clean_laps',
+    'mean_ms', 'median_ms', 'degradation_ms_per_lap',
+]
+PIT_STOP_KEYS = ['race_id', 'driver_id', 'stop', 'lap', 'duration_ms', 'pit_loss_ms']
+
+Arrays = Dict[str, np.ndarray]
+
+LAP_ARRAYS = ('race_id', 'driver_id', 'lap', 'milliseconds')
+
+
+def read_laps(conn: sqlite3.Connection, race_ids: List[int], store: LapStore | None = None) -> Arrays:
+    """Reads the laps of some races as arrays sorted by race, driver and lap.
+
+    Races the store does not hold, e.g. added after it was exported, or whose
+    laps changed since, are read from SQLite.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection.
+        race_ids (List[int]): Race ids.
+        store (LapStore | None, optional): Lap store. Defaults to None.
+
+    Returns:
+        Arrays: race_id, driver_id, lap and milliseconds arrays.
+    """
+    race_ids = sorted(race_ids)
+    stored = sorted(stored_races(conn, store, race_ids))
+    missing = sorted(set(race_ids) - set(stored))
+    parts = []
+    if stored:
+        slices = [store.race_laps(race_id) for race_id in stored]
+        parts.append({
+            'race_id': np.repeat(stored, [len(laps['lap']) for laps in slices]).astype(np.int64),
+            **{
+                column: np.concatenate([laps[column] for laps in slices]).astype(np.int64)
+                for column in LAP_ARRAYS[1:]
+            },
+        })
+    if missing or not parts:
+        cur = conn.execute(
+            'SELECT race_id, driver_id, lap, coalesce(milliseconds, -1) '
+            f"FROM {partition_source(conn, 'lap_times', race_ids=missing)} "
+            f"WHERE race_id IN ({','.join('?' * len(missing))}) ORDER BY race_id, driver_id, lap;",
+            missing
+        )
+        rows = np.array(cur.fetchall(), dtype=np.int64).reshape(-1, 4)
+        parts.append({column: rows[:, i] for i, column in enumerate(LAP_ARRAYS)})
+    if len(parts) == 1:
+        return parts[0]
+    laps = {column: np.concatenate([part[column] for part in parts]) for column in LAP_ARRAYS}
+    order = np.lexsort((laps['lap'], laps['driver_id'], laps['race_id']))
+    return {column: values[order] for column, values in laps.items()}
+
+
+def read_pit_stops(conn: sqlite3.Connection, race_ids: List[int]) -> Arrays:
+    """Reads the pit stops of some races as arrays sorted by race, driver and lap.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection.
+        race_ids (List[int]): Race ids.
+
+    Returns:
+        Arrays: race_id, driver_id, stop, lap and milliseconds arrays.
+    """
+    cur = conn.execute(
+        'SELECT race_id, driver_id, stop, lap, coalesce(milliseconds, -1) '
+        f"FROM {partition_source(conn, 'pit_stops', race_ids=race_ids)} "
+        f"WHERE race_id IN ({','.join('?' * len(race_ids))}) ORDER BY race_id, driver_id, lap;",
+        race_ids
+    )
+    rows = np.array(cur.fetchall(), dtype=np.int64).reshape(-1, 5)
+    return {column: rows[:, i] for i, column in enumerate(('race_id', 'driver_id', 'stop', 'lap', 'milliseconds'))}
+
+
+def _group_median(values: np.ndarray, groups: np.ndarray, n_groups: int) -> np.ndarray:
+    """Median of `values` per group id, NaN for empty groups."""
+    order = np.lexsort((values, groups))
+    values = values[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    medians = np.full(n_groups, np.nan)
+    has = counts > 0
+    low = starts[has] + (counts[has] - 1) // 2
+    high = starts[has] + counts[has] // 2
+    medians[has] = (values[low] + values[high]) / 2
+    return medians
+
+
+def _group_ids(*keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Ids of consecutive runs of equal keys in sorted rows, and the index where each run starts."""
+    changes = np.zeros(len(keys[0]), dtype=bool)
+    changes[:1] = True
+    for key in keys:
+        changes[1:] |= key[1:] != key[:-1]
+    return np.cumsum(changes) - 1, np.flatnonzero(changes)
+
+
+def _nan_to_none(values: np.ndarray) -> List:
+    return [None if np.isnan(value) else round(float(value), 1) for value in values]
+
+
+def compute_stints(laps: Arrays, pit_stops: Arrays) -> Tuple[List[Dict], List[Dict]]:
+    """Splits every driver's race into stints at their pit stops and computes
+    pace figures, in one vectorized pass over any number of races.
+
+    A stint ends on the lap a driver pits (in-lap); the next lap (out-lap)
+    starts the following stint. Pace uses clean laps only: not the first lap,
+    an in- or out-lap, or slower than SLOW_LAP_FACTOR times the race's median
+    clean lap. Degradation is the least-squares slope of clean lap time over
+    laps into the stint. Pit loss is the in- and out-lap time in excess of two
+    of the driver's median clean laps.
+
+    Args:
+        laps (Arrays): Laps from `read_laps`.
+        pit_stops (Arrays): Pit stops from `read_pit_stops`.
+
+    Returns:
+        Tuple[List[Dict], List[Dict]]: Stints (STINT_KEYS) and pit stops (PIT_STOP_KEYS).
+    """
+    if not len(laps['lap']):
+        return [], _pit_stop_rows(pit_stops, np.full(len(pit_stops['lap']), np.nan))
+    race, driver, lap, ms = laps['race_id'], laps['driver_id'], laps['lap'], laps['milliseconds'].astype(float)
+
+    # Encode (race, driver, lap) as one sortable integer to match laps with pit stops.
+    n_drivers = int(max(driver.max(), pit_stops['driver_id'].max(initial=0))) + 1
+    n_laps = int(max(lap.max(), pit_stops['lap'].max(initial=0))) + 2
+    driver_key = race * n_drivers + driver
+    lap_key = driver_key * n_laps + lap
+    pit_key = np.sort((pit_stops['race_id'] * n_drivers + pit_stops['driver_id']) * n_laps + pit_stops['lap'])
+
+    stint = np.searchsorted(pit_key, lap_key) - np.searchsorted(pit_key, driver_key * n_laps)
+    in_lap = np.isin(lap_key, pit_key)
+    out_lap = np.isin(lap_key - 1, pit_key)
+
+    race_group, _ = _group_ids(race)
+    driver_group, driver_starts = _group_ids(driver_key)
+    group, starts = _group_ids(driver_key, stint)
+    n_groups = len(starts)
+
+    clean = (lap > 1) & ~in_lap & ~out_lap & (ms > 0)
+    race_median = _group_median(ms[clean], race_group[clean], race_group[-1] + 1)
+    clean &= ms <= SLOW_LAP_FACTOR * race_median[race_group]
+
+    g, y = group[clean], ms[clean]
+    x = (lap - lap[starts][group])[clean].astype(float)
+    n = np.bincount(g, minlength=n_groups).astype(float)
+    sum_x, sum_y = np.bincount(g, x, n_groups), np.bincount(g, y, n_groups)
+    sum_xx, sum_xy = np.bincount(g, x * x, n_groups), np.bincount(g, x * y, n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sum_y / n
+        denominator = n * sum_xx - sum_x ** 2
+        slope = np.where((n >= 3) & (denominator > 0), (n * sum_xy - sum_x * sum_y) / denominator, np.nan)
+    median = _group_median(y, g, n_groups)
+
+    ends = np.append(starts[1:], len(lap)) - 1
+    stints = [
+        dict(zip(STINT_KEYS, row)) for row in zip(
+            race[starts].tolist(), driver[starts].tolist(), (stint[starts] + 1).tolist(),
+            lap[starts].tolist(), lap[ends].tolist(), (ends - starts + 1).tolist(), n.astype(int).tolist(),
+            _nan_to_none(mean), _nan_to_none(median), _nan_to_none(slope),
+        )
+    ]
+
+    # Pit loss against the driver's median clean lap in the race.
+    driver_median = _group_median(ms[clean], driver_group[clean], driver_group[-1] + 1)
+    stop_key = (pit_stops['race_id'] * n_drivers + pit_stops['driver_id']) * n_laps + pit_stops['lap']
+
+    def lap_time(keys):
+        i = np.minimum(np.searchsorted(lap_key, keys), len(lap_key) - 1)
+        return np.where(lap_key[i] == keys, ms[i], np.nan)
+
+    stop_driver = np.searchsorted(driver_key[driver_starts], stop_key // n_laps)
+    stop_driver_median = np.full(len(stop_key), np.nan)
+    known = (stop_driver < len(driver_starts))
+    known[known] = driver_key[driver_starts][stop_driver[known]] == stop_key[known] // n_laps
+    stop_driver_median[known] = driver_median[stop_driver[known]]
+    pit_loss = lap_time(stop_key) + lap_time(stop_key + 1) - 2 * stop_driver_median
+    return stints, _pit_stop_rows(pit_stops, pit_loss)
+
+
+def _pit_stop_rows(pit_stops: Arrays, pit_loss: np.ndarray) -> List[Dict]:
+    duration = np.where(pit_stops['milliseconds'] > 0, pit_stops['milliseconds'], np.nan)
+    return [
+        dict(zip(PIT_STOP_KEYS, row)) for row in zip(
+            pit_stops['race_id'].tolist(), pit_stops['driver_id'].tolist(), pit_stops['stop'].tolist(),
+            pit_stops['lap'].tolist(), _nan_to_none(duration), _nan_to_none(pit_loss),
+        )
+    ]
@@ -0,0 +1,108 @@
+import sqlite3
+from typing import Dict, List, Optional
+
+
+TEAMMATE_PAIRS_TABLE = '_teammate_pairs'
+
+# One row per race for every ordered pair of drivers entered by the same
+# constructor, i.e. each pairing appears once from either driver's side.
+# Qualifying battles are null when either driver has no qualifying result and
+# finishing battles are null unless both drivers were classified.
+TEAMMATE_PAIRS_QUERY = r"""
+    select r.race_id,
+        ra.year,
+        r.constructor_id,
+        r.driver_id,
+        t.driver_id                                         as teammate_id,
+        case when q.position is null or tq.position is null
+            then null else q.position < tq.position end     as quali_ahead,
+        r.position_order < t.position_order                 as race_ahead,
+        case when r.position in ('\N', '') or t.position in ('\N', '')
+            then null else r.position_order < t.position_order end as finish_ahead,
+        r.points,
+        t.points                                            as teammate_points
+    from results r
+        join results t on t.race_id = r.race_id
+            and t.constructor_id = r.constructor_id
+            and t.driver_id != r.driver_id
+        join races ra on ra.id = r.race_id
+        left join qualifying q on q.race_id = r.race_id and q.driver_id = r.driver_id
+        left join qualifying tq on tq.race_id = t.race_id and tq.driver_id = t.driver_id
+"""
+
+_SUMMARY_COLUMNS = """
+    count(*)                            as races,
+    coalesce(sum(quali_ahead), 0)       as quali_ahead,
+    coalesce(sum(quali_ahead = 0), 0)   as quali_behind,
+    sum(race_ahead)                     as race_ahead,
+    sum(race_ahead = 0)                 as race_behind,
+    coalesce(sum(finish_ahead), 0)      as finish_ahead,
+    coalesce(sum(finish_ahead = 0), 0)  as finish_behind,
+    sum(points)                         as points,
+    sum(teammate_points)                as teammate_points
+"""
+
+
+def build_teammate_pairs(conn: sqlite3.Connection):
+    """(Re)builds the teammate pair table from `results` and `qualifying`.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection.
+    """
+    conn.executescript(f"""
+        DROP TABLE IF EXISTS {TEAMMATE_PAIRS_TABLE};
+        CREATE TABLE {TEAMMATE_PAIRS_TABLE} AS {TEAMMATE_PAIRS_QUERY};
+        CREATE INDEX idx{TEAMMATE_PAIRS_TABLE}_driver_teammate_year
+            ON {TEAMMATE_PAIRS_TABLE} (driver_id, teammate_id, year);
+        CREATE INDEX idx{TEAMMATE_PAIRS_TABLE}_driver_year
+            ON {TEAMMATE_PAIRS_TABLE} (driver_id, year);
+    """)
+
+
+def has_teammate_pairs(conn: sqlite3.Connection) -> bool:
+    cur = conn.cursor()
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?;", (TEAMMATE_PAIRS_TABLE,))
+    return cur.fetchone() is not None
+
+
+def get_head_to_head(
+    conn: sqlite3.Connection,
+    driver_id: int,
+    teammate_id: Optional[int] = None,
+    year: Optional[int] = None,
+) -> Dict[str, List[Dict]]:
+    """Gets a driver's qualifying and race record against their teammates.
+
+    Reads the precomputed pair table when available and falls back to
+    computing the pairs on the fly otherwise.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection.
+        driver_id (int): Driver id.
+        teammate_id (Optional[int], optional): Only compare against this teammate. Defaults to None.
+        year (Optional[int], optional): Only compare within this season. Defaults to None.
+
+    Returns:
+        Dict[str, List[Dict]]: Per season and teammate ('seasons') and per teammate ('career') summaries.
+    """
+    if has_teammate_pairs(conn):
+        source = TEAMMATE_PAIRS_TABLE
+    else:
+        source = f'({TEAMMATE_PAIRS_QUERY} where r.driver_id = :driver_id)'
+    where = 'driver_id = :driver_id'
+    if teammate_id is not None:
+        where += ' and teammate_id = :teammate_id'
+    if year is not None:
+        where += ' and year = :year'
+    params = {'driver_id': driver_id, 'teammate_id': teammate_id, 'year': year}
+
+    summaries = {}
+    for key, group_by in (('seasons', 'year, teammate_id'), ('career', 'teammate_id')):
+        cur = conn.execute(
+            f'select {group_by}, {_SUMMARY_COLUMNS} from {source} '
+            f'where {where} group by {group_by} order by {group_by};',
+            params
+        )
+        keys = [d[0] for d in cur.description]
+        summaries[key] = [dict(zip(keys, row)) for row in cur.fetchall()]
+    return summaries
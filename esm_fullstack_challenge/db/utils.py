@@ -1,6 +1,74 @@
+import os
 from typing import List, Tuple, Any
 
 
+COMPARISON_OPERATORS = ['=', '!=', '<', '>', '<=', '>=']
+
+
+def sidecar_path(db_file: str, suffix: str) -> str:
+    """Path of data derived from a database file, stored next to the file it
+    resolves to so it is versioned, swapped and pruned with the snapshot.
+    """
+    return os.path.splitext(os.path.realpath(db_file))[0] + suffix
+
+
+def sql_literal(value: Any) -> str:
+    """Formats a python value as a SQL literal."""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'{}'".format(str(value).replace("'", "''"))
+
+
+def _prefix_upper_bound(prefix: str) -> str | None:
+    """Smallest string greater than every string starting with `prefix`, or None."""
+    prefix = prefix.rstrip(chr(0x10FFFF))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def operator_filter(column: str, operator: str, value: Any) -> str:
+    """Compiles a single (column, operator, value) filter to a SQL condition.
+
+    Every condition is written so that SQLite can answer it with an index on
+    `column`: prefix matches are compiled to a range rather than a `like`.
+
+    Args:
+        column (str): Column name.
+        operator (str): One of COMPARISON_OPERATORS, 'between', 'is null', 'is not null'
+                        or 'startswith'.
+        value (Any): Value to compare against; a (low, high) pair for `between`,
+                     ignored for null checks.
+
+    Returns:
+        str: SQL condition.
+    """
+    operator = operator.lower()
+    if operator in COMPARISON_OPERATORS:
+        return f'{column} {operator} {sql_literal(value)}'
+    elif operator == 'between':
+        if not isinstance(value, (list, tuple)) or len(value) != 2:
+            raise ValueError(f'Invalid between value: {value}')
+        low, high = value
+        return f'{column} between {sql_literal(low)} and {sql_literal(high)}'
+    elif operator == 'is null':
+        # The source data uses \N as a null marker.
+        return f"({column} is null or {column} = '\\N')"
+    elif operator == 'is not null':
+        return f"({column} is not null and {column} != '\\N')"
+    elif operator == 'startswith':
+        upper = _prefix_upper_bound(str(value))
+        if upper is None:
+            return f'{column} is not null'
+        return f'({column} >= {sql_literal(str(value))} and {column} < {sql_literal(upper)})'
+    else:
+        raise ValueError(f'Invalid operator: {operator}')
+
+
 def query_builder(
         table: str | None = None,
         columns: List[str] | None = None,
@@ -29,7 +97,11 @@ def query_builder(
         limit (int | None, optional): Number of rows to return. Defaults to None.
         offset (int | None, optional): Number of rows to offset. Defaults to None.
         filter_by (List[Tuple[str, Any]  |  Tuple[str, str, Any]] | None, optional): List of tuples
-                                                                                     to filter by. Defaults to None.
+                                                                                     to filter by, either
+                                                                                     (column, value) or
+                                                                                     (column, operator, value).
+                                                                                     See `operator_filter` for
+                                                                                     operators. Defaults to None.
         count_only (bool | None, optional): If True, query will return full count of query ignoring
                                             any limit or offset. Defaults to False.
 
@@ -72,22 +144,13 @@ def query_builder(
                 if len(col_tuple) == 2:
                     column, value = col_tuple
                     if isinstance(value, (list, tuple)):
-                        value = ', '.join(f'"{v}"' if isinstance(v, str) else str(v) for v in value)
+                        value = ', '.join(sql_literal(v) for v in value)
                         filter_str_list.append(f'{column} in ({value})')
                     else:
-                        filter_str_list.append(
-                            f'{column}="{value}"' if isinstance(value, str) else
-                            f'{column}={value}'
-                        )
+                        filter_str_list.append(f'{column}={sql_literal(value)}')
                 elif len(col_tuple) == 3:
                     column, operator, value = col_tuple
-                    if operator.lower() in ['=', '!=', '<', '>', '<=', '>=']:
-                        filter_str_list.append(
-                            f'{column} {operator} "{value}"' if isinstance(value, str) else
-                            f'{column} {operator} {value}'
-                        )
-                    else:
-                        raise ValueError(f'Invalid operator: {operator}')
+                    filter_str_list.append(operator_filter(column, operator, value))
                 else:
                     raise ValueError(f'Invalid filter_by tuple length: {len(col_tuple)}')
             else:
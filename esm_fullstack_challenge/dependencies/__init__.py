@@ -1,3 +1,4 @@
 # flake8: noqa
-from esm_fullstack_challenge.dependencies.common import CommonQueryParams
-from esm_fullstack_challenge.dependencies.db import get_db
+from esm_fullstack_challenge.dependencies.admin import verify_admin_token
+from esm_fullstack_challenge.dependencies.common import CommonQueryParams, SeriesFormat, get_fields
+from esm_fullstack_challenge.dependencies.db import get_db, snapshot_manager
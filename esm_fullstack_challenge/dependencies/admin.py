@@ -0,0 +1,16 @@
+import secrets
+
+from fastapi import Header, HTTPException, status
+
+from esm_fullstack_challenge.config import ADMIN_TOKEN
+
+
+def verify_admin_token(x_admin_token: str | None = Header(None)):
+    """Only lets requests through that send the configured ADMIN_TOKEN in
+    the X-Admin-Token header. Admin routes are disabled if no token is configured.
+    """
+    if not ADMIN_TOKEN or not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='Invalid admin token!'
+        )
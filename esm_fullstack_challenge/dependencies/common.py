@@ -1,8 +1,12 @@
 import json
 from enum import Enum
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Any, get_args
 
-from fastapi import Query
+from fastapi import Query, HTTPException, status
+from pydantic import BaseModel
+
+from esm_fullstack_challenge.config import MAX_PAGE_SIZE
+from esm_fullstack_challenge.profiling import profile_phase
 
 
 class SortDirection(str, Enum):
@@ -20,6 +24,69 @@ class SortDirection(str, Enum):
             raise ValueError(f"Invalid sort direction: {value}")
 
 
+class SeriesFormat(str, Enum):
+    """Enumeration for the JSON shape of time series.
+
+    `records` returns a list of objects, `columns` returns an object of
+    equally long lists, e.g. {"driver": [...], "lap": [...]}.
+    """
+    RECORDS = 'records'
+    COLUMNS = 'columns'
+
+
+SEARCH_FILTER = 'q'
+
+# Filter key suffixes and the query_builder operators they map to, e.g. {"year_gte": 2010}.
+FILTER_OPERATORS = {
+    '_gte': '>=',
+    '_gt': '>',
+    '_lte': '<=',
+    '_lt': '<',
+    '_neq': '!=',
+    '_between': 'between',
+    '_null': 'is null',
+    '_like': 'startswith',
+}
+
+
+def parse_filter_key(key: str, columns: List[str] | None = None) -> Tuple[str, str | None]:
+    """Splits a filter key into a column and an operator.
+
+    Args:
+        key (str): Filter key, e.g. 'year' or 'year_gte'.
+        columns (List[str] | None, optional): Known column names, used to tell columns apart
+                                              from operator suffixes. Defaults to None.
+
+    Returns:
+        Tuple[str, str | None]: Column name and operator (None for equality).
+    """
+    if columns is not None and key in columns:
+        return key, None
+    for suffix, operator in FILTER_OPERATORS.items():
+        if key.endswith(suffix):
+            return key[:-len(suffix)], operator
+    return key, None
+
+
+def _filter_tuple(column: str, operator: str | None, value: Any) -> Tuple:
+    if operator is None:
+        return (column, tuple(value)) if isinstance(value, list) else (column, value)
+    if operator == 'is null' and not value:
+        return column, 'is not null', None
+    return column, operator, value
+
+
+def _coerce(value: Any, field_type: type) -> Any:
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, list):
+        return [_coerce(v, field_type) for v in value]
+    if field_type is int and isinstance(value, float) and not value.is_integer():
+        # int() would truncate, e.g. turning year_gte 2010.5 into 2010.
+        raise ValueError(f'{value} is not an integer')
+    return field_type(value) if field_type in (int, float, str) else value
+
+
 class CommonQueryParams:
     """Class to handle common query parameters for filtering, sorting, and pagination."""
     def __init__(
@@ -28,29 +95,93 @@ class CommonQueryParams:
         range_param: Optional[str] = Query('[0, 24]', alias='range'),
         sort_param: Optional[str] = Query(None, alias='sort'),
     ):
-        self.filter = json.loads(filter_param or 'null')
-        self.range = json.loads(range_param or 'null')
-        self.sort = json.loads(sort_param or 'null')
+        with profile_phase('common_query_params'):
+            self.filter = json.loads(filter_param or 'null')
+            self.range = json.loads(range_param or 'null')
+            self.sort = json.loads(sort_param or 'null')
 
     @property
     def order_by(self) -> List[Tuple[str, str]]:
         return [(self.sort[0], self.sort[1])] if self.sort and len(self.sort) == 2 else []
 
     @property
-    def filter_by(self) -> List[Tuple[str, Tuple] | Tuple[str, str]]:
+    def filter_by(self) -> List[Tuple[str, Tuple] | Tuple[str, Any] | Tuple[str, str, Any]]:
         if not self.filter:
             return []
         filter_list = []
         for key, value in self.filter.items():
-            if isinstance(value, list):
-                filter_list.append((key, tuple(value)))
-            else:
-                filter_list.append((key, value))
+            if key == SEARCH_FILTER:
+                continue
+            filter_list.append(_filter_tuple(*parse_filter_key(key), value))
         return filter_list
 
+    def validated_filter_by(
+            self, table_model: BaseModel
+    ) -> List[Tuple[str, Tuple] | Tuple[str, Any] | Tuple[str, str, Any]]:
+        """Same as `filter_by` but checks every column against a table model and
+        casts values to the column's type, so comparisons can use indexes.
+
+        Args:
+            table_model (BaseModel): Pydantic model of the filtered table.
+
+        Raises:
+            HTTPException: If a filter refers to an unknown column or has an invalid value.
+
+        Returns:
+            List[Tuple]: List of tuples to pass to `query_builder`.
+        """
+        if not self.filter:
+            return []
+        fields = table_model.model_fields
+        filter_list = []
+        for key, value in self.filter.items():
+            if key == SEARCH_FILTER:
+                continue
+            column, operator = parse_filter_key(key, list(fields))
+            if column not in fields:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f'Invalid filter: {key}'
+                )
+            if operator == 'between' and not (isinstance(value, list) and len(value) == 2):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f'Invalid filter: {key} expects a [low, high] list'
+                )
+            field_types = [t for t in get_args(fields[column].annotation) if t is not type(None)]
+            field_type = field_types[0] if field_types else fields[column].annotation
+            if operator == 'startswith' and field_type is not str:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f'Invalid filter: {key} only applies to text columns'
+                )
+            if operator == 'is null' and not isinstance(value, bool):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f'Invalid filter value for {key}: expects true or false'
+                )
+            try:
+                value = value if operator == 'is null' else _coerce(value, field_type)
+            except (TypeError, ValueError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f'Invalid filter value for {key}: {value}'
+                )
+            filter_list.append(_filter_tuple(column, operator, value))
+        return filter_list
+
+    @property
+    def search(self) -> str | None:
+        if not self.filter or self.filter.get(SEARCH_FILTER) is None:
+            return None
+        return str(self.filter[SEARCH_FILTER]).strip() or None
+
     @property
-    def limit(self) -> int | None:
-        return (self.range[1] - self.range[0] + 1) if self.range else None
+    def limit(self) -> int:
+        """Number of rows requested by `range`, capped at MAX_PAGE_SIZE."""
+        if not self.range:
+            return MAX_PAGE_SIZE
+        return max(0, min(self.range[1] - self.range[0] + 1, MAX_PAGE_SIZE))
 
     @property
     def offset(self) -> int:
@@ -62,3 +193,31 @@ class CommonQueryParams:
             'range': self.range,
             'sort': self.sort,
         }
+
+
+def get_fields(
+        fields_param: Optional[str] = Query(
+            None, alias='fields',
+            description='Comma separated or JSON list of columns to return, e.g. id,forename,surname'
+        )
+) -> List[str] | None:
+    """Parses the `fields` query parameter used to return a subset of columns.
+
+    Raises:
+        HTTPException: If `fields` is neither a comma separated nor a JSON list.
+    """
+    if not fields_param:
+        return None
+    if fields_param.lstrip().startswith('['):
+        try:
+            fields = json.loads(fields_param)
+        except json.JSONDecodeError:
+            fields = None
+        if not isinstance(fields, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f'Invalid fields: {fields_param}'
+            )
+    else:
+        fields = fields_param.split(',')
+    return [str(f).strip() for f in fields if str(f).strip()] or None
@@ -1,10 +1,12 @@
-from esm_fullstack_challenge.config import DB_FILE
-from esm_fullstack_challenge.db import DB
+from esm_fullstack_challenge.config import DB_FILE, DB_READ_ONLY, SNAPSHOT_CHECK_INTERVAL
+from esm_fullstack_challenge.db.snapshots import SnapshotManager
+
+
+snapshot_manager = SnapshotManager(
+    DB_FILE, read_only=DB_READ_ONLY, check_interval=SNAPSHOT_CHECK_INTERVAL
+)
 
 
 def get_db():
-    try:
-        db = DB(DB_FILE)
+    with snapshot_manager.acquire() as db:
         yield db
-    finally:
-        pass
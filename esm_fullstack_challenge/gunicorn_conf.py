@@ -0,0 +1,95 @@
+"""Gunicorn configuration for serving the API in production.
+
+The application (models, routes and dimension data) is imported once in the
+master process and shared copy-on-write by the forked workers. Workers switch
+to newly published database snapshots on their own; a watcher thread in the
+master refreshes its preloaded data when that happens, and re-imports the
+application and replaces the workers in place (as on SIGHUP) if the snapshot's
+schema changed. The master itself keeps running, so it can be the process
+supervised by make, Docker or systemd.
+"""
+import gc
+import os
+import signal
+import sys
+import threading
+import time
+
+# Workers only ever read from the database.
+os.environ.setdefault('DB_READ_ONLY', 'true')
+
+from esm_fullstack_challenge.config import DB_FILE, DB_READ_ONLY, DB_WATCH_INTERVAL, PORT, WORKERS  # noqa: E402
+from esm_fullstack_challenge.db.snapshots import get_file_signature  # noqa: E402
+from esm_fullstack_challenge.models.utils import load_schema_manifest  # noqa: E402
+
+
+def get_core_count() -> int:
+    """Number of cores available to this process."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = f'0.0.0.0:{PORT}'
+workers = WORKERS or get_core_count()
+worker_class = 'uvicorn_worker.UvicornWorker'
+preload_app = True
+graceful_timeout = 30
+accesslog = '-'
+
+
+def watch_db_file(server):
+    """Follows snapshot swaps of the database file in the master process."""
+    signature = get_file_signature(DB_FILE)
+    schema = load_schema_manifest(DB_FILE)
+    while True:
+        time.sleep(DB_WATCH_INTERVAL)
+        new_signature = get_file_signature(DB_FILE)
+        if new_signature is None or new_signature == signature:
+            continue
+        signature = new_signature
+        if load_schema_manifest(DB_FILE) != schema:
+            server.log.info('Schema of %s changed, reloading application', DB_FILE)
+            schema = load_schema_manifest(DB_FILE)
+            reload_application(server)
+        else:
+            server.log.info('Database file %s swapped, refreshing preloaded data', DB_FILE)
+            preload_data(server)
+
+
+def reload_application(server):
+    """Re-imports the application in the master and replaces the workers with SIGHUP.
+
+    With `preload_app` a plain SIGHUP forks the new workers from the application
+    already loaded, so the cached application and its modules are dropped first
+    and the reload imports them afresh, with models matching the new schema.
+    """
+    for name in list(sys.modules):
+        if name.split('.')[0] == 'esm_fullstack_challenge' and name != __name__:
+            del sys.modules[name]
+    server.app.callable = None
+    os.kill(os.getpid(), signal.SIGHUP)
+
+
+def preload_data(server):
+    """Loads dimension data and freezes the heap so workers share it."""
+    # Imported here to use the modules of the application currently loaded.
+    from esm_fullstack_challenge.db import DB
+    from esm_fullstack_challenge.db.dimensions import load_dimensions
+
+    # Objects of a replaced application can only be collected once unfrozen.
+    gc.unfreeze()
+    load_dimensions(DB(DB_FILE, read_only=DB_READ_ONLY))
+    gc.collect()
+    gc.freeze()
+
+
+def when_ready(server):
+    preload_data(server)
+    if DB_WATCH_INTERVAL > 0:
+        threading.Thread(target=watch_db_file, args=(server,), daemon=True).start()
+
+
+def on_reload(server):
+    preload_data(server)
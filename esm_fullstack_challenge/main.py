@@ -1,19 +1,63 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+import logging
+import time
+from contextlib import asynccontextmanager
 
-from esm_fullstack_challenge import __version__
-from esm_fullstack_challenge.routers import basic_router, dashboard_router, \
-    drivers_router, races_router
-from esm_fullstack_challenge.config import CORS_ORIGINS
+_import_start = time.perf_counter()
 
+from fastapi import FastAPI  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
 
-app = FastAPI(title="F1 DATA API", version=__version__)
+from esm_fullstack_challenge import __version__  # noqa: E402
+from esm_fullstack_challenge.routers import admin_router, basic_router, dashboard_router, \
+    drivers_router, races_router, standings_router  # noqa: E402
+from esm_fullstack_challenge.config import CORS_ORIGINS, COMPRESSION_MIN_SIZE, \
+    COMPRESSION_CACHE_SIZE, ADMIN_TOKEN, PROFILE_SAMPLE_RATE, PROFILE_CPROFILE, ADMISSION_CHEAP_LIMIT, \
+    ADMISSION_CHEAP_QUEUE, ADMISSION_EXPENSIVE_LIMIT, ADMISSION_EXPENSIVE_QUEUE, ADMISSION_QUEUE_TIMEOUT  # noqa: E402
+from esm_fullstack_challenge.middleware import AdmissionControlMiddleware, CompressionMiddleware, \
+    ProfilingMiddleware  # noqa: E402
+from esm_fullstack_challenge.profiling import ProfiledRoute, profile_store  # noqa: E402
+from esm_fullstack_challenge.timing import STARTUP_TIMINGS, format_timings  # noqa: E402
+
+
+logger = logging.getLogger('uvicorn.error')
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info('Startup timings: %s', format_timings(STARTUP_TIMINGS))
+    yield
+
+
+app = FastAPI(title="F1 DATA API", version=__version__, lifespan=lifespan)
+app.router.route_class = ProfiledRoute
+# Added first so it sits inside CORS and rejections still carry CORS headers.
+app.add_middleware(
+    AdmissionControlMiddleware,
+    cheap_limit=ADMISSION_CHEAP_LIMIT,
+    cheap_queue=ADMISSION_CHEAP_QUEUE,
+    expensive_limit=ADMISSION_EXPENSIVE_LIMIT,
+    expensive_queue=ADMISSION_EXPENSIVE_QUEUE,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=CORS_ORIGINS.split(','),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile-Id", "Retry-After"],
+)
+app.add_middleware(
+    ProfilingMiddleware,
+    store=profile_store,
+    token=ADMIN_TOKEN,
+    sample_rate=PROFILE_SAMPLE_RATE,
+    cprofile=PROFILE_CPROFILE,
+)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MIN_SIZE,
+    cache_size=COMPRESSION_CACHE_SIZE,
 )
 
 
@@ -33,4 +77,8 @@ def ping():
 app.include_router(basic_router, prefix='', tags=['Basic'])
 app.include_router(drivers_router, prefix='/drivers', tags=['Drivers'])
 app.include_router(races_router, prefix='/races', tags=['Races'])
+app.include_router(standings_router, prefix='/standings', tags=['Standings'])
 app.include_router(dashboard_router, prefix='/dashboard', tags=['Dashboard'])
+app.include_router(admin_router, prefix='/admin', tags=['Admin'])
+
+STARTUP_TIMINGS['total'] = time.perf_counter() - _import_start
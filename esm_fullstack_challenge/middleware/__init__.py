@@ -0,0 +1,4 @@
+# flake8: noqa
+from esm_fullstack_challenge.middleware.admission import AdmissionControlMiddleware
+from esm_fullstack_challenge.middleware.compression import CompressionMiddleware
+from esm_fullstack_challenge.middleware.profiling import ProfilingMiddleware
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import math
+import re
+from collections import deque
+from typing import Deque, Iterable
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+# Routes doing heavy aggregation, as opposed to paginated lists and lookups by id.
+EXPENSIVE_ROUTES = (
+    r'^/races/\w+_summary/',
+    r'^/races/season_stints/',
+    r'^/races/[^/]+/stints$',
+    r'^/standings(/|$)',
+    r'^/drivers/[^/]+/head_to_head$',
+    r'^/dashboard(/|$)',
+)
+
+# Routes never subject to admission control: health checks, operator
+# endpoints and long-lived event streams.
+EXEMPT_ROUTES = (
+    r'^/ping$',
+    r'^/admin(/|$)',
+    r'^/races/[^/]+/stream$',
+)
+
+
+class Rejected(Exception):
+    """Raised when a request cannot be admitted."""
+    def __init__(self, status_code: int, detail: str):
+        self.status_code = status_code
+        self.detail = detail
+
+
+class ConcurrencyLimiter:
+    """Lets at most `limit` requests run at once, queueing up to `queue_size`
+    more for at most `timeout` seconds each.
+
+    Slots are handed over to queued requests in arrival order.
+    """
+    def __init__(self, name: str, limit: int, queue_size: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        """Waits for a free slot.
+
+        Raises:
+            Rejected: With 429 if the queue is full, or 503 if no slot frees up in time.
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            raise Rejected(429, f'Too many {self.name} requests, try again later.')
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait([waiter], timeout=self.timeout)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        if not waiter.done():
+            self._abandon(waiter)
+            raise Rejected(503, f'Timed out waiting to serve {self.name} request, try again later.')
+
+    def _abandon(self, waiter: asyncio.Future):
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over while giving up, so pass it on.
+            self.release()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionControlMiddleware:
+    """Applies separate concurrency limits to cheap and expensive routes so a
+    burst of heavy requests cannot starve the threadpool, and sheds load with
+    fast 429/503 responses carrying Retry-After once a class's queue is full or
+    a request waited too long.
+    """
+    def __init__(
+            self,
+            app: ASGIApp,
+            cheap_limit: int = 32,
+            cheap_queue: int = 64,
+            expensive_limit: int = 4,
+            expensive_queue: int = 8,
+            queue_timeout: float = 5.0,
+            expensive_routes: Iterable[str] = EXPENSIVE_ROUTES,
+            exempt_routes: Iterable[str] = EXEMPT_ROUTES,
+    ):
+        self.app = app
+        self.limiters = {
+            'cheap': ConcurrencyLimiter('cheap', cheap_limit, cheap_queue, queue_timeout),
+            'expensive': ConcurrencyLimiter('expensive', expensive_limit, expensive_queue, queue_timeout),
+        }
+        self.retry_after = str(max(1, math.ceil(queue_timeout)))
+        self.expensive_routes = [re.compile(pattern) for pattern in expensive_routes]
+        self.exempt_routes = [re.compile(pattern) for pattern in exempt_routes]
+
+    def classify(self, path: str) -> str | None:
+        if any(pattern.search(path) for pattern in self.exempt_routes):
+            return None
+        if any(pattern.search(path) for pattern in self.expensive_routes):
+            return 'expensive'
+        return 'cheap'
+
+    async def reject(self, send: Send, error: Rejected):
+        body = json.dumps({'detail': error.detail}).encode()
+        headers = [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+            (b'retry-after', self.retry_after.encode()),
+        ]
+        await send({'type': 'http.response.start', 'status': error.status_code, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        route_class = self.classify(scope['path']) if scope['type'] == 'http' else None
+        if route_class is None or scope['method'] == 'OPTIONS':
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters[route_class]
+        try:
+            await limiter.acquire()
+        except Rejected as error:
+            await self.reject(send, error)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
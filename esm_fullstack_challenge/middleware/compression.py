@@ -0,0 +1,187 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript', 'application/xml')
+
+# Bodies larger than this are compressed off the event loop.
+THREAD_THRESHOLD = 64 * 1024
+
+
+def get_codecs() -> Dict[str, Callable[[bytes], bytes]]:
+    """Available compression codecs, in order of preference."""
+    codecs = {}
+    try:
+        import zstandard
+        codecs['zstd'] = lambda data: zstandard.ZstdCompressor(level=3).compress(data)
+    except ImportError:
+        pass
+    try:
+        import brotli
+        codecs['br'] = lambda data: brotli.compress(data, quality=5)
+    except ImportError:
+        pass
+    codecs['gzip'] = lambda data: gzip.compress(data, compresslevel=6, mtime=0)
+    return codecs
+
+
+def negotiate_encoding(accept_encoding: str, available: List[str]) -> str | None:
+    """Picks the best encoding accepted by the client.
+
+    Args:
+        accept_encoding (str): Value of the Accept-Encoding request header.
+        available (List[str]): Encodings supported by the server, most preferred first.
+
+    Returns:
+        str | None: Chosen encoding, or None to send the body uncompressed.
+    """
+    weights = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressedBodyCache:
+    """Thread-safe LRU cache of compressed bodies, bounded by total size."""
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: OrderedDict[Tuple[str, bytes], bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, bytes]) -> bytes | None:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key: Tuple[str, bytes], value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+
+class CompressionMiddleware:
+    """Compresses complete (non-streaming) responses with zstd, brotli or gzip
+    depending on what the client accepts and which libraries are installed.
+
+    Compressed bodies of cacheable responses are kept in an LRU cache keyed by
+    the body's hash so identical responses are only compressed once.
+    """
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, cache_size: int = 32 * 1024 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.codecs = get_codecs()
+        self.cache = CompressedBodyCache(cache_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get('accept-encoding', ''), list(self.codecs)
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message, passthrough
+            if message['type'] == 'http.response.start':
+                start_message = message
+                return
+            if message['type'] != 'http.response.body' or passthrough:
+                await send(message)
+                return
+            if start_message is not None and message.get('more_body', False):
+                # Streaming response (e.g. server-sent events), send as is.
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = await self.compress(scope, start_message, message.get('body', b''), encoding)
+            await send(start_message)
+            await send({'type': 'http.response.body', 'body': body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def should_compress(self, start_message: Message, body: bytes) -> bool:
+        headers = Headers(raw=start_message['headers'])
+        content_type = headers.get('content-type', '')
+        return (
+            len(body) >= self.minimum_size
+            and 'content-encoding' not in headers
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+        )
+
+    def is_cacheable(self, scope: Scope, start_message: Message) -> bool:
+        cache_control = Headers(raw=start_message['headers']).get('cache-control', '')
+        return (
+            scope['method'] in ('GET', 'HEAD')
+            and start_message['status'] == 200
+            and 'no-store' not in cache_control
+        )
+
+    async def compress(self, scope: Scope, start_message: Message, body: bytes, encoding: str) -> bytes:
+        if not self.should_compress(start_message, body):
+            return body
+
+        cache_key = None
+        compressed = None
+        if self.is_cacheable(scope, start_message):
+            cache_key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+            compressed = self.cache.get(cache_key)
+
+        if compressed is None:
+            codec = self.codecs[encoding]
+            if len(body) > THREAD_THRESHOLD:
+                compressed = await anyio.to_thread.run_sync(codec, body)
+            else:
+                compressed = codec(body)
+            if cache_key is not None:
+                self.cache.set(cache_key, compressed)
+
+        headers = MutableHeaders(raw=start_message['headers'])
+        headers['Content-Encoding'] = encoding
+        headers['Content-Length'] = str(len(compressed))
+        headers.add_vary_header('Accept-Encoding')
+        return compressed
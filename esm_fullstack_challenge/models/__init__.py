@@ -1,4 +1,7 @@
 # flake8: noqa
+from esm_fullstack_challenge.config import DB_FILE, SCHEMA_MANIFEST
 from esm_fullstack_challenge.models.utils import autogen_models
+from esm_fullstack_challenge.timing import timed
 
-AutoGenModels = autogen_models()
+with timed('models'):
+    AutoGenModels = autogen_models(DB_FILE, SCHEMA_MANIFEST)
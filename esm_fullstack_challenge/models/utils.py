@@ -1,42 +1,129 @@
+import hashlib
+import json
+import os
 import sqlite3
 from typing import List, Dict
 
-import pandas as pd
 from pydantic import create_model, Field, BaseModel
 
+from esm_fullstack_challenge.db.db import DB
+
+
+SchemaManifest = Dict[str, Dict[str, str]]
+
 
 def get_all_table_names(conn: sqlite3.Connection) -> List[str]:
+    """Names of all data tables. Internal tables (search indexes and other derived
+    data) are prefixed with an underscore and excluded.
+    """
     cursor = conn.cursor()
-    query = "SELECT name FROM sqlite_master WHERE type='table';"
+    query = (
+        "SELECT name FROM sqlite_master WHERE type='table' "
+        "AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\' AND name NOT LIKE '\\_%' ESCAPE '\\';"
+    )
     cursor.execute(query)
 
     return [row[0] for row in cursor.fetchall()]
 
 
-def autogen_models(db: str = 'data.db') -> Dict[str, BaseModel]:
+def get_schema_hash(conn: sqlite3.Connection) -> str:
+    """Returns a hash of the SQL defining the main database's schema.
+
+    Unlike SQLite's schema cookie, which only counts changes, it differs
+    between databases with different schemas.
+    """
+    digest = hashlib.sha256()
+    for (sql,) in conn.execute(
+            'SELECT sql FROM main.sqlite_master WHERE sql IS NOT NULL ORDER BY type, name;').fetchall():
+        digest.update(sql.encode() + b'\0')
+    return digest.hexdigest()
+
+
+def build_schema_manifest(conn: sqlite3.Connection) -> SchemaManifest:
+    """Reads the declared column types of every table as stored in the main database.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection.
+
+    Returns:
+        SchemaManifest: Dictionary of table name to a dictionary of column name to SQLite type.
+    """
+    return {
+        table: {
+            row[1]: row[2].upper()
+            for row in conn.execute(f'PRAGMA main.table_info({table});').fetchall()
+        }
+        for table in get_all_table_names(conn)
+    }
+
+
+def write_schema_manifest(db: str, manifest_file: str):
+    """Writes the schema manifest of a database to a JSON file.
+
+    Args:
+        db (str): Path to SQLite DB file.
+        manifest_file (str): Path of JSON file to write.
+    """
+    conn = sqlite3.connect(db)
+    try:
+        manifest = {
+            'schema_hash': get_schema_hash(conn),
+            'tables': build_schema_manifest(conn),
+        }
+    finally:
+        conn.close()
+
+    with open(manifest_file, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def load_schema_manifest(db: str, manifest_file: str | None = None) -> SchemaManifest:
+    """Loads the schema manifest, falling back to introspecting the database
+    when the manifest is missing or out of date.
+
+    Args:
+        db (str): Path to SQLite DB file.
+        manifest_file (str | None, optional): Path of precomputed JSON manifest. Defaults to None.
+
+    Returns:
+        SchemaManifest: Dictionary of table name to a dictionary of column name to SQLite type.
+    """
+    if not os.path.exists(db):
+        return {}
+    conn = DB(db, read_only=True).connect()
+    try:
+        if manifest_file and os.path.exists(manifest_file):
+            with open(manifest_file) as f:
+                manifest = json.load(f)
+            if manifest.get('schema_hash') == get_schema_hash(conn):
+                return manifest['tables']
+        return build_schema_manifest(conn)
+    finally:
+        conn.close()
+
+
+def autogen_models(db: str = 'data.db', manifest_file: str | None = None) -> Dict[str, BaseModel]:
     """Generate Pydantic models for all tables in the SQLite database.
 
     Args:
         db (str, optional): Path to SQLite DB file. Defaults to 'data.db'.
+        manifest_file (str | None, optional): Path of precomputed schema manifest. Defaults to None.
 
     Returns:
         Dict[str, BaseModel]: Returns a dictionary where keys are table names and values are Pydantic models.
     """
-    conn = sqlite3.connect(db)
-    tables = get_all_table_names(conn)
     models = {}
 
     type_map = {
-        'int64': int,
-        'float64': float,
-        'object': str,
+        'INTEGER': int,
+        'REAL': float,
+        'TEXT': str,
     }
 
-    for table in tables:
-        df = pd.read_sql_query(f"SELECT * FROM {table}", conn)
+    for table, columns in load_schema_manifest(db, manifest_file).items():
         types = {
-            k: (type_map[str(v)], Field())
-            for k, v in df.dtypes.to_dict().items()
+            k: (type_map.get(v, str) | None, Field())
+            for k, v in columns.items()
         }
         table_model = create_model(
             f'{"".join(table.replace("_", " ").title().split())}Model',
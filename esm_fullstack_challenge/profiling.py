@@ -0,0 +1,216 @@
+import cProfile
+import functools
+import inspect
+import json
+import os
+import pstats
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from glob import glob
+from typing import Callable, Dict, List
+
+from fastapi.routing import APIRoute
+
+from esm_fullstack_challenge.config import PROFILE_DIR, PROFILE_RETAIN
+from esm_fullstack_challenge.timing import timed
+
+
+class RequestProfile:
+    """Phase timings, and optionally a cProfile of the endpoint, for one request."""
+    def __init__(self, method: str, path: str, trigger: str, cprofile: bool = False):
+        self.id = uuid.uuid4().hex
+        self.created_at = datetime.now(timezone.utc).isoformat()
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.status: int | None = None
+        self.phases: Dict[str, float] = {}
+        self.marks: Dict[str, float] = {}
+        self.cprofile = cprofile
+        self.stats: pstats.Stats | None = None
+
+    def server_timing(self) -> str:
+        """Phase timings formatted as a Server-Timing header value."""
+        return ', '.join(f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.phases.items())
+
+    def top_functions(self, limit: int = 25) -> List[dict]:
+        if self.stats is None:
+            return []
+        self.stats.sort_stats('cumulative')
+        functions = []
+        for func in self.stats.fcn_list[:limit]:
+            _, ncalls, tottime, cumtime, _ = self.stats.stats[func]
+            functions.append({
+                'function': pstats.func_std_string(func),
+                'ncalls': ncalls,
+                'tottime': round(tottime, 6),
+                'cumtime': round(cumtime, 6),
+            })
+        return functions
+
+    def as_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'created_at': self.created_at,
+            'method': self.method,
+            'path': self.path,
+            'trigger': self.trigger,
+            'status': self.status,
+            'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            'top_functions': self.top_functions(),
+        }
+
+
+_current_profile: ContextVar[RequestProfile | None] = ContextVar('current_profile', default=None)
+
+
+def get_current_profile() -> RequestProfile | None:
+    return _current_profile.get()
+
+
+@contextmanager
+def profiling(profile: RequestProfile):
+    """Context manager making `profile` the profile of the current request."""
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+@contextmanager
+def profile_phase(name: str):
+    """Records the duration of its block as a phase of the current request's
+    profile. Does nothing when the request is not being profiled.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+    else:
+        with timed(name, profile.phases):
+            yield
+
+
+def _profiled_endpoint(endpoint: Callable) -> Callable:
+    """Wraps an endpoint to mark when it starts and ends, and to run it under
+    cProfile when requested.
+    """
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            profile = _current_profile.get()
+            if profile is None:
+                return await endpoint(*args, **kwargs)
+            profile.marks['endpoint_start'] = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                profile.marks['endpoint_end'] = time.perf_counter()
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None:
+            return endpoint(*args, **kwargs)
+        profiler = cProfile.Profile() if profile.cprofile else None
+        profile.marks['endpoint_start'] = time.perf_counter()
+        try:
+            if profiler is not None:
+                try:
+                    profiler.enable()
+                except ValueError:
+                    # Another request is already being profiled in this process.
+                    profiler = None
+            return endpoint(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profile.stats = pstats.Stats(profiler)
+            profile.marks['endpoint_end'] = time.perf_counter()
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """Route class splitting a profiled request's handling time into dependency
+    resolution, endpoint execution and response serialization.
+    """
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _profiled_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def profiled_handler(request):
+            profile = _current_profile.get()
+            if profile is None:
+                return await handler(request)
+            start = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                end = time.perf_counter()
+                endpoint_start = profile.marks.get('endpoint_start', end)
+                endpoint_end = profile.marks.get('endpoint_end', end)
+                profile.phases['dependencies'] = endpoint_start - start
+                profile.phases['endpoint'] = endpoint_end - endpoint_start
+                profile.phases['serialization'] = end - endpoint_end
+
+        return profiled_handler
+
+
+class ProfileStore:
+    """Stores request profiles as JSON files (plus a .prof file with the cProfile
+    stats, when captured) in a local directory, keeping the most recent ones.
+    """
+    def __init__(self, directory: str, retain: int = 200):
+        self.directory = directory
+        self.retain = retain
+
+    def _path(self, profile_id: str, extension: str) -> str:
+        if not re.fullmatch(r'[0-9a-f]{32}', profile_id):
+            raise ValueError(f'Invalid profile id: {profile_id}')
+        return os.path.join(self.directory, f'{profile_id}.{extension}')
+
+    def save(self, profile: RequestProfile):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(profile.id, 'json'), 'w') as f:
+            json.dump(profile.as_dict(), f, indent=2)
+        if profile.stats is not None:
+            profile.stats.dump_stats(self._path(profile.id, 'prof'))
+        self.prune()
+
+    def prune(self):
+        files = sorted(glob(os.path.join(self.directory, '*.json')), key=os.path.getmtime)
+        for old in files[:-self.retain] if self.retain > 0 else files:
+            for path in (old, old[:-len('json')] + 'prof'):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def list(self, limit: int = 50) -> List[dict]:
+        files = sorted(glob(os.path.join(self.directory, '*.json')), key=os.path.getmtime, reverse=True)
+        profiles = []
+        for path in files[:limit]:
+            with open(path) as f:
+                profile = json.load(f)
+            profile.pop('top_functions', None)
+            profiles.append(profile)
+        return profiles
+
+    def get(self, profile_id: str) -> dict | None:
+        path = self._path(profile_id, 'json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def get_stats_file(self, profile_id: str) -> str | None:
+        path = self._path(profile_id, 'prof')
+        return path if os.path.exists(path) else None
+
+
+profile_store = ProfileStore(PROFILE_DIR, retain=PROFILE_RETAIN)
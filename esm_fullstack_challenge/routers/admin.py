@@ -0,0 +1,88 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+
+from esm_fullstack_challenge.dependencies import snapshot_manager, verify_admin_token
+from esm_fullstack_challenge.profiling import profile_store
+
+
+admin_router = APIRouter(dependencies=[Depends(verify_admin_token)])
+
+
+@admin_router.get("/snapshots")
+def get_snapshots() -> dict:
+    """Gets the database snapshot currently served and the ones still draining.
+
+    Returns:
+        dict: Snapshot status.
+    """
+    return snapshot_manager.status()
+
+
+@admin_router.post("/snapshots/refresh")
+def refresh_snapshot() -> dict:
+    """Switches to the latest published snapshot without waiting for the next check.
+
+    Returns:
+        dict: Whether a new snapshot was activated, and the snapshot status.
+    """
+    swapped = snapshot_manager.refresh()
+    return {'swapped': swapped, **snapshot_manager.status()}
+
+
+@admin_router.get("/profiles")
+def get_profiles(limit: int = 50) -> List[dict]:
+    """Lists the most recent request profiles.
+
+    Args:
+        limit (int, optional): Maximum number of profiles to return. Defaults to 50.
+
+    Returns:
+        List[dict]: Profile summaries with phase timings, newest first.
+    """
+    return profile_store.list(limit)
+
+
+@admin_router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str) -> dict:
+    """Gets a request profile, including the top functions by cumulative time.
+
+    Args:
+        profile_id (str): Profile id, as returned in the X-Profile-Id response header.
+
+    Returns:
+        dict: Request profile.
+    """
+    try:
+        profile = profile_store.get(profile_id)
+    except ValueError:
+        profile = None
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Profile with id={profile_id} does not exist!'
+        )
+    return profile
+
+
+@admin_router.get("/profiles/{profile_id}/pstats")
+def get_profile_stats(profile_id: str) -> FileResponse:
+    """Downloads the cProfile stats of a request, to be opened with pstats or snakeviz.
+
+    Args:
+        profile_id (str): Profile id.
+
+    Returns:
+        FileResponse: .prof file.
+    """
+    try:
+        stats_file = profile_store.get_stats_file(profile_id)
+    except ValueError:
+        stats_file = None
+    if stats_file is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Stats for profile with id={profile_id} do not exist!'
+        )
+    return FileResponse(stats_file, filename=f'{profile_id}.prof')
@@ -1,11 +1,13 @@
-import pandas as pd
+import sqlite3
+
 from fastapi import APIRouter, Depends
 
 from esm_fullstack_challenge.db import DB, query_builder
 from esm_fullstack_challenge.dependencies import get_db, CommonQueryParams
+from esm_fullstack_challenge.profiling import ProfiledRoute
 
 
-dashboard_router = APIRouter()
+dashboard_router = APIRouter(route_class=ProfiledRoute)
 
 
 @dashboard_router.get("/top_drivers_by_wins")
@@ -51,7 +53,9 @@ def get_top_drivers_by_wins(
         group_by=['id', 'full_name', 'nationality', 'dob', 'age', 'url']
     )
     with db.get_connection() as conn:
-        df = pd.read_sql_query(query_str, conn)
-        drivers = list(df.to_dict(orient='records'))
+        conn.row_factory = sqlite3.Row
+        cur = conn.cursor()
+        cur.execute(query_str)
+        drivers = [dict(row) for row in cur.fetchall()]
 
     return drivers
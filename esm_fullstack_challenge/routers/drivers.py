@@ -1,13 +1,17 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
 
 from esm_fullstack_challenge.models import AutoGenModels
 from esm_fullstack_challenge.routers.utils import \
     get_route_list_function, get_route_id_function
+from esm_fullstack_challenge.dependencies import get_db
+from esm_fullstack_challenge.db import DB
+from esm_fullstack_challenge.db.teammates import get_head_to_head
+from esm_fullstack_challenge.profiling import ProfiledRoute
 
 
-drivers_router = APIRouter()
+drivers_router = APIRouter(route_class=ProfiledRoute)
 
 table_model = AutoGenModels['drivers']
 
@@ -26,6 +30,42 @@ drivers_router.add_api_route(
 )
 
 
+# Route to compare a driver against their teammates
+@drivers_router.get('/{id}/head_to_head')
+def get_driver_head_to_head(
+    id: int,
+    teammate_id: Optional[int] = None,
+    year: Optional[int] = None,
+    db: DB = Depends(get_db),
+):
+    """
+    Qualifying and race battles against teammates, per season and over the career.
+    """
+    with db.get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute('SELECT forename, surname FROM drivers WHERE id = ?', (id,))
+        driver = cur.fetchone()
+        if not driver:
+            raise HTTPException(status_code=404, detail='Driver not found.')
+
+        head_to_head = get_head_to_head(conn, id, teammate_id=teammate_id, year=year)
+        teammate_ids = sorted({row['teammate_id'] for row in head_to_head['career']})
+        cur.execute(
+            f"SELECT id, forename, surname FROM drivers WHERE id IN ({','.join('?' * len(teammate_ids))})",
+            teammate_ids,
+        )
+        names = {id_: f'{forename} {surname}' for id_, forename, surname in cur.fetchall()}
+
+    for rows in head_to_head.values():
+        for row in rows:
+            row['teammate'] = names.get(row['teammate_id'], 'Unknown')
+    return {
+        'driver_id': id,
+        'driver': f'{driver[0]} {driver[1]}',
+        **head_to_head,
+    }
+
+
 # Add route to create a new driver
 @drivers_router.post('', response_model=table_model)
 def create_driver():
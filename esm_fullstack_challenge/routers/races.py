@@ -1,16 +1,24 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
 from esm_fullstack_challenge.models import AutoGenModels
 from esm_fullstack_challenge.routers.utils import \
-    get_route_list_function, get_route_id_function
+    get_route_list_function, get_route_id_function, format_series
 
-from esm_fullstack_challenge.dependencies import get_db
+from esm_fullstack_challenge.config import STREAM_HEARTBEAT, STREAM_POLL_INTERVAL
+from esm_fullstack_challenge.dependencies import get_db, snapshot_manager, SeriesFormat
 from esm_fullstack_challenge.db import DB
+from esm_fullstack_challenge.db.dimensions import get_dimension
+from esm_fullstack_challenge.db.partitions import partition_source
+from esm_fullstack_challenge.singleflight import single_flight
+from esm_fullstack_challenge.streams import race_events
+from esm_fullstack_challenge.profiling import ProfiledRoute
 
 
-races_router = APIRouter()
+races_router = APIRouter(route_class=ProfiledRoute)
 
 table_model = AutoGenModels['races']
 
@@ -30,9 +38,15 @@ races_router.add_api_route(
 
 # Route to get race circuit tab data
 @races_router.get("/race_circuit_summary/{race_id}")
-def get_race_circuit_summary(race_id: int, db: DB = Depends(get_db)):
+@single_flight()
+def get_race_circuit_summary(
+    race_id: int,
+    series_format: SeriesFormat = SeriesFormat.RECORDS,
+    db: DB = Depends(get_db),
+):
     with db.get_connection() as conn:
         cur = conn.cursor()
+        laps_table = partition_source(conn, 'lap_times', race_ids=[race_id])
 
         # Get race + circuit metadata
         cur.execute("""
@@ -47,9 +61,9 @@ def get_race_circuit_summary(race_id: int, db: DB = Depends(get_db)):
         race_name, year, circuit_name, location = row
 
         # Top 20 fastest laps
-        cur.execute("""
+        cur.execute(f"""
             SELECT d.surname, l.lap, l.milliseconds
-            FROM lap_times l
+            FROM {laps_table} l
             JOIN drivers d ON l.driver_id = d.id
             WHERE l.race_id = ?
             ORDER BY l.milliseconds ASC
@@ -66,30 +80,28 @@ def get_race_circuit_summary(race_id: int, db: DB = Depends(get_db)):
         ]
 
         # Race pace evolution
-        cur.execute("""
+        cur.execute(f"""
             SELECT d.forename || ' ' || d.surname as driver, l.lap, l.milliseconds
-            FROM lap_times l
+            FROM {laps_table} l
             JOIN drivers d ON l.driver_id = d.id
             WHERE l.race_id = ?
             ORDER BY driver, lap
         """, (race_id,))
-        pace_evolution = [
-            {"driver": row[0], "lap": row[1], "milliseconds": row[2]}
-            for row in cur.fetchall()
-        ]
+        pace_evolution = format_series(
+            cur.fetchall(), ["driver", "lap", "milliseconds"], series_format
+        )
 
         # Position Evolution for All Drivers
-        cur.execute("""
+        cur.execute(f"""
             SELECT d.forename || ' ' || d.surname as driver, l.lap, l.position
-            FROM lap_times l
+            FROM {laps_table} l
             JOIN drivers d ON l.driver_id = d.id
             WHERE l.race_id = ?
             ORDER BY driver, lap
         """, (race_id,))
-        position_evolution = [
-            {"driver": row[0], "lap": row[1], "position": row[2]}
-            for row in cur.fetchall()
-        ]
+        position_evolution = format_series(
+            cur.fetchall(), ["driver", "lap", "position"], series_format
+        )
 
     return {
         "circuit_name": circuit_name,
@@ -103,9 +115,13 @@ def get_race_circuit_summary(race_id: int, db: DB = Depends(get_db)):
 
 # Route to get drivers tab data
 @races_router.get("/race_driver_summary/{race_id}")
+@single_flight()
 def get_race_driver_summary(race_id: int, db: DB = Depends(get_db)):
+    constructors = get_dimension('constructors', db)
     with db.get_connection() as conn:
         cur = conn.cursor()
+        laps_table = partition_source(conn, 'lap_times', race_ids=[race_id])
+        results_table = partition_source(conn, 'results', race_ids=[race_id])
 
         def get_driver_name(driver_id):
             cur.execute("SELECT forename, surname FROM drivers WHERE id = ?", (driver_id,))
@@ -113,9 +129,8 @@ def get_race_driver_summary(race_id: int, db: DB = Depends(get_db)):
             return f"{d[0]} {d[1]}" if d else "Unknown"
 
         def get_constructor_info(constructor_id):
-            cur.execute("SELECT name FROM constructors WHERE id = ?", (constructor_id,))
-            c = cur.fetchone()
-            return {"name": c[0]} if c else {"name": "Unknown"}
+            c = constructors.get(constructor_id)
+            return {"name": c["name"]} if c else {"name": "Unknown"}
 
         def safe_int(val):
             try:
@@ -129,9 +144,9 @@ def get_race_driver_summary(race_id: int, db: DB = Depends(get_db)):
             return f"{minutes}:{seconds:06.3f}"
 
         # Race Winner
-        cur.execute("""
+        cur.execute(f"""
             SELECT driver_id, constructor_id, time, milliseconds
-            FROM results
+            FROM {results_table}
             WHERE race_id = ? AND position = 1
         """, (race_id,))
         winner = cur.fetchone()
@@ -163,10 +178,10 @@ def get_race_driver_summary(race_id: int, db: DB = Depends(get_db)):
             }
 
         # Fastest Lap
-        cur.execute("""
+        cur.execute(f"""
             SELECT lt.driver_id, r.constructor_id, lt.lap, lt.milliseconds
-            FROM lap_times lt
-            JOIN results r ON lt.race_id = r.race_id AND lt.driver_id = r.driver_id
+            FROM {laps_table} lt
+            JOIN {results_table} r ON lt.race_id = r.race_id AND lt.driver_id = r.driver_id
             WHERE lt.race_id = ?
             ORDER BY lt.milliseconds ASC
             LIMIT 1
@@ -184,9 +199,9 @@ def get_race_driver_summary(race_id: int, db: DB = Depends(get_db)):
             }
 
         # Race Results
-        cur.execute("""
+        cur.execute(f"""
             SELECT r.position, d.forename, d.surname, c.name, r.time, r.milliseconds, r.points, r.laps
-            FROM results r
+            FROM {results_table} r
             JOIN drivers d ON r.driver_id = d.id
             JOIN constructors c ON r.constructor_id = c.id
             WHERE r.race_id = ?
@@ -226,14 +241,21 @@ def get_race_driver_summary(race_id: int, db: DB = Depends(get_db)):
 
 # Route to get constructors tab data
 @races_router.get("/race_constructor_summary/{race_id}")
-def get_race_constructor_summary(race_id: int, db: DB = Depends(get_db)):
+@single_flight()
+def get_race_constructor_summary(
+    race_id: int,
+    series_format: SeriesFormat = SeriesFormat.RECORDS,
+    db: DB = Depends(get_db),
+):
     with db.get_connection() as conn:
         cur = conn.cursor()
+        laps_table = partition_source(conn, 'lap_times', race_ids=[race_id])
+        results_table = partition_source(conn, 'results', race_ids=[race_id])
 
         # Best Finishing Constructor
-        cur.execute("""
+        cur.execute(f"""
             SELECT c.name, MIN(r.position)
-            FROM results r
+            FROM {results_table} r
             JOIN constructors c ON r.constructor_id = c.id
             WHERE r.race_id = ? AND r.position IS NOT NULL
             GROUP BY c.id
@@ -244,9 +266,9 @@ def get_race_constructor_summary(race_id: int, db: DB = Depends(get_db)):
         best_finisher_data = {"team": best_finisher[0], "position": best_finisher[1]} if best_finisher else None
 
         # Constructor with Most Points
-        cur.execute("""
+        cur.execute(f"""
             SELECT c.name, SUM(r.points)
-            FROM results r
+            FROM {results_table} r
             JOIN constructors c ON r.constructor_id = c.id
             WHERE r.race_id = ?
             GROUP BY c.id
@@ -257,12 +279,13 @@ def get_race_constructor_summary(race_id: int, db: DB = Depends(get_db)):
         top_points_data = {"team": top_points[0], "points": top_points[1]} if top_points else None
 
         # Constructor Results
-        cur.execute("""
+        cur.execute(f"""
             SELECT c.name, d.forename || ' ' || d.surname, r.position, r.points, r.laps
-            FROM results r
+            FROM {results_table} r
             JOIN constructors c ON r.constructor_id = c.id
             JOIN drivers d ON r.driver_id = d.id
             WHERE r.race_id = ?
+            ORDER BY r.id
         """, (race_id,))
         grouped = {}
         for team, driver, position, points, laps in cur.fetchall():
@@ -293,12 +316,13 @@ def get_race_constructor_summary(race_id: int, db: DB = Depends(get_db)):
             })
 
         # Points per driver
-        cur.execute("""
+        cur.execute(f"""
             SELECT c.name, d.forename || ' ' || d.surname, r.points
-            FROM results r
+            FROM {results_table} r
             JOIN constructors c ON r.constructor_id = c.id
             JOIN drivers d ON r.driver_id = d.id
             WHERE r.race_id = ?
+            ORDER BY r.id
         """, (race_id,))
         driver_points = [
             {"constructor": row[0], "driver": row[1], "points": row[2] or 0}
@@ -306,19 +330,18 @@ def get_race_constructor_summary(race_id: int, db: DB = Depends(get_db)):
         ]
 
         # Position Evolution
-        cur.execute("""
+        cur.execute(f"""
             SELECT l.lap, c.name, AVG(CAST(l.position AS INTEGER))
-            FROM lap_times l
-            JOIN results r ON l.race_id = r.race_id AND l.driver_id = r.driver_id
+            FROM {laps_table} l
+            JOIN {results_table} r ON l.race_id = r.race_id AND l.driver_id = r.driver_id
             JOIN constructors c ON r.constructor_id = c.id
             WHERE l.race_id = ? AND l.position != '\\N'
             GROUP BY l.lap, c.name
             ORDER BY l.lap, c.name
         """, (race_id,))
-        position_evolution = [
-            {"lap": lap, "team": team, "position": avg}
-            for lap, team, avg in cur.fetchall()
-        ]
+        position_evolution = format_series(
+            cur.fetchall(), ["lap", "team", "position"], series_format
+        )
 
     return {
         "best_finisher": best_finisher_data,
@@ -327,4 +350,165 @@ def get_race_constructor_summary(race_id: int, db: DB = Depends(get_db)):
         "driver_points": driver_points,
         "position_evolution": position_evolution
     }
-    
\ No newline at end of file
+
+
+# Route to get lap records and pace percentiles of a circuit across seasons
+@races_router.get("/circuit_lap_summary/{circuit_id}")
+@single_flight()
+def get_circuit_lap_summary(circuit_id: int, db: DB = Depends(get_db)):
+    # NumPy is only loaded by the lap analytics, not on app import.
+    import numpy as np
+    from esm_fullstack_challenge.db.lapstore import get_lap_store, read_race_laps
+
+    circuit = get_dimension('circuits', db).get(circuit_id)
+    if not circuit:
+        raise HTTPException(status_code=404, detail="Circuit not found.")
+
+    store = get_lap_store(db)
+    seasons = []
+    with db.get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT id, year, name
+            FROM races
+            WHERE circuit_id = ?
+            ORDER BY year, round
+        """, (circuit_id,))
+        for race_id, year, race_name in cur.fetchall():
+            laps = read_race_laps(conn, race_id, store, ('driver_id', 'lap', 'milliseconds'))
+            timed_laps = laps['milliseconds'] > 0
+            milliseconds = laps['milliseconds'][timed_laps]
+            if not len(milliseconds):
+                continue
+            fastest = int(np.argmin(milliseconds))
+            p10, median, p90 = np.percentile(milliseconds, [10, 50, 90])
+            seasons.append({
+                "year": year,
+                "race_id": race_id,
+                "race_name": race_name,
+                "laps": len(milliseconds),
+                "fastest_lap": {
+                    "driver_id": int(laps['driver_id'][timed_laps][fastest]),
+                    "lap": int(laps['lap'][timed_laps][fastest]),
+                    "milliseconds": int(milliseconds[fastest]),
+                },
+                "p10": float(p10),
+                "median": float(median),
+                "p90": float(p90),
+            })
+
+        driver_ids = sorted({season["fastest_lap"]["driver_id"] for season in seasons})
+        cur.execute(
+            f"SELECT id, forename, surname FROM drivers WHERE id IN ({','.join('?' * len(driver_ids))})",
+            driver_ids,
+        )
+        names = {id_: f"{forename} {surname}" for id_, forename, surname in cur.fetchall()}
+
+    for season in seasons:
+        season["fastest_lap"]["driver"] = names.get(season["fastest_lap"]["driver_id"], "Unknown")
+    record = min(seasons, key=lambda season: season["fastest_lap"]["milliseconds"], default=None)
+
+    return {
+        "circuit_name": circuit["name"],
+        "location": circuit["location"],
+        "lap_record": {"year": record["year"], **record["fastest_lap"]} if record else None,
+        "seasons": seasons,
+    }
+
+
+def get_stint_analysis(db: DB, race_ids: List[int], series_format: SeriesFormat) -> dict:
+    # NumPy is only loaded by the lap analytics, not on app import.
+    from esm_fullstack_challenge.db.lapstore import get_lap_store
+    from esm_fullstack_challenge.db.stints import PIT_STOP_KEYS, STINT_KEYS, compute_stints, read_laps, \
+        read_pit_stops
+
+    store = get_lap_store(db)
+    with db.get_connection() as conn:
+        stints, pit_stops = compute_stints(read_laps(conn, race_ids, store), read_pit_stops(conn, race_ids))
+        driver_ids = sorted({row["driver_id"] for row in stints})
+        cur = conn.execute(
+            f"SELECT id, forename, surname FROM drivers WHERE id IN ({','.join('?' * len(driver_ids))})",
+            driver_ids,
+        )
+        drivers = {id_: f"{forename} {surname}" for id_, forename, surname in cur.fetchall()}
+
+    return {
+        "drivers": drivers,
+        "stints": format_series([list(row.values()) for row in stints], STINT_KEYS, series_format),
+        "pit_stops": format_series([list(row.values()) for row in pit_stops], PIT_STOP_KEYS, series_format),
+    }
+
+
+# Route to get stint pace and pit stop analysis of a race
+@races_router.get("/{race_id}/stints")
+@single_flight()
+def get_race_stints(
+    race_id: int,
+    series_format: SeriesFormat = SeriesFormat.RECORDS,
+    db: DB = Depends(get_db),
+):
+    with db.get_connection() as conn:
+        row = conn.execute("SELECT name, year FROM races WHERE id = ?", (race_id,)).fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Race not found.")
+
+    return {
+        "race_id": race_id,
+        "race_name": row[0],
+        "year": row[1],
+        **get_stint_analysis(db, [race_id], series_format),
+    }
+
+
+# Route to get stint pace and pit stop analysis of every race of a season
+@races_router.get("/season_stints/{year}")
+@single_flight()
+def get_season_stints(
+    year: int,
+    series_format: SeriesFormat = SeriesFormat.RECORDS,
+    db: DB = Depends(get_db),
+):
+    with db.get_connection() as conn:
+        races = conn.execute(
+            "SELECT id, round, name FROM races WHERE year = ? ORDER BY round", (year,)
+        ).fetchall()
+    if not races:
+        raise HTTPException(status_code=404, detail="No races for this season.")
+
+    return {
+        "year": year,
+        "races": [{"race_id": race_id, "round": round_, "name": name} for race_id, round_, name in races],
+        **get_stint_analysis(db, [race[0] for race in races], series_format),
+    }
+
+
+def get_stream_db() -> DB:
+    # Streams outlive snapshots, so they follow the current one instead of holding one open.
+    return snapshot_manager.current().db
+
+
+def race_exists(race_id: int) -> bool:
+    with get_stream_db().get_connection() as conn:
+        return conn.execute("SELECT 1 FROM races WHERE id = ?", (race_id,)).fetchone() is not None
+
+
+# Route to stream new lap times and pit stops of a race as server-sent events
+@races_router.get("/{race_id}/stream")
+async def stream_race(
+    race_id: int,
+    last_lap: Optional[int] = None,
+    last_event_id: Optional[str] = Header(None),
+):
+    if not await run_in_threadpool(race_exists, race_id):
+        raise HTTPException(status_code=404, detail="Race not found.")
+    if last_lap is None and last_event_id and last_event_id.isdigit():
+        last_lap = int(last_event_id)
+
+    return StreamingResponse(
+        race_events(
+            race_id, last_lap or 0, get_stream_db,
+            interval=STREAM_POLL_INTERVAL, heartbeat=STREAM_HEARTBEAT,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
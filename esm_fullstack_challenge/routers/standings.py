@@ -0,0 +1,71 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from esm_fullstack_challenge.dependencies import get_db
+from esm_fullstack_challenge.db import DB
+from esm_fullstack_challenge.db.dimensions import get_dimension
+from esm_fullstack_challenge.db.standings import get_race_standings
+from esm_fullstack_challenge.profiling import ProfiledRoute
+
+
+standings_router = APIRouter(route_class=ProfiledRoute)
+
+
+def _race_standings(db: DB, race_id: int) -> dict:
+    constructors = get_dimension('constructors', db)
+    with db.get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id, year, round, name FROM races WHERE id = ?", (race_id,))
+        race = cur.fetchone()
+        if not race:
+            raise HTTPException(status_code=404, detail="Race not found.")
+
+        drivers = get_race_standings(conn, 'drivers', race_id)
+        driver_ids = [row['driver_id'] for row in drivers]
+        cur.execute(
+            f"SELECT id, forename, surname FROM drivers WHERE id IN ({','.join('?' * len(driver_ids))})",
+            driver_ids,
+        )
+        driver_names = {id_: f"{forename} {surname}" for id_, forename, surname in cur.fetchall()}
+        for row in drivers:
+            row["driver"] = driver_names.get(row["driver_id"], "Unknown")
+
+        teams = get_race_standings(conn, 'constructors', race_id)
+        for row in teams:
+            c = constructors.get(row["constructor_id"])
+            row["constructor"] = c["name"] if c else "Unknown"
+
+    return {
+        "race_id": race[0],
+        "year": race[1],
+        "round": race[2],
+        "race_name": race[3],
+        "drivers": drivers,
+        "constructors": teams,
+    }
+
+
+# Route to get the championship standings after a race
+@standings_router.get("/race/{race_id}")
+def get_standings_after_race(race_id: int, db: DB = Depends(get_db)):
+    return _race_standings(db, race_id)
+
+
+# Route to get the championship standings of a season, after its latest (or a given) round
+@standings_router.get("/{year}")
+def get_season_standings(year: int, round: Optional[int] = None, db: DB = Depends(get_db)):
+    with db.get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT id
+            FROM races
+            WHERE year = ? AND round <= coalesce(?, round)
+                AND id IN (SELECT race_id FROM results)
+            ORDER BY round DESC
+            LIMIT 1
+        """, (year, round))
+        row = cur.fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="No results for this season.")
+    return _race_standings(db, row[0])
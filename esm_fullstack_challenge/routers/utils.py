@@ -1,14 +1,16 @@
 import sqlite3
 from functools import lru_cache
-from typing import Callable
+from typing import Any, Callable, List, Tuple, Sequence
 
-import pandas as pd
 from fastapi import Depends, Response, HTTPException, status
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, TypeAdapter, create_model
 
 from esm_fullstack_challenge.db import DB, query_builder
-from esm_fullstack_challenge.dependencies import get_db, CommonQueryParams
+from esm_fullstack_challenge.db.partitions import partition_source
+from esm_fullstack_challenge.db.search import SEARCH_COLUMNS, search_query_parts
+from esm_fullstack_challenge.dependencies import get_db, get_fields, CommonQueryParams, SeriesFormat
 from esm_fullstack_challenge.models import AutoGenModels
+from esm_fullstack_challenge.profiling import profile_phase
 
 
 @lru_cache()
@@ -21,6 +23,75 @@ def get_id_column_name(table: str) -> str | None:
     return None
 
 
+def get_filtered_race_ids(filter_by: List[Tuple]) -> List[Any]:
+    """Race ids an equality filter on `race_id` restricts a query to, used for partition pruning."""
+    race_ids = []
+    for item in filter_by:
+        if len(item) == 2 and item[0] == 'race_id':
+            race_ids.extend(item[1] if isinstance(item[1], (list, tuple)) else [item[1]])
+    return race_ids
+
+
+def format_series(
+        rows: Sequence[Sequence],
+        keys: List[str],
+        series_format: SeriesFormat = SeriesFormat.RECORDS,
+) -> List[dict] | dict:
+    """Shapes query rows as a list of records or as compact columns.
+
+    Args:
+        rows (Sequence[Sequence]): Rows with one value per key.
+        keys (List[str]): Name of each value.
+        series_format (SeriesFormat, optional): Output shape. Defaults to SeriesFormat.RECORDS.
+
+    Returns:
+        List[dict] | dict: List of {key: value} records or {key: [values]} columns.
+    """
+    if series_format == SeriesFormat.COLUMNS:
+        columns = list(zip(*rows)) or [()] * len(keys)
+        return {key: list(values) for key, values in zip(keys, columns)}
+    return [dict(zip(keys, row)) for row in rows]
+
+
+@lru_cache()
+def get_projected_model(table_model: BaseModel, fields: Tuple[str, ...]) -> BaseModel:
+    """Builds a model with only a subset of a table model's fields."""
+    return create_model(
+        f'{table_model.__name__}Projection',
+        **{
+            field: (table_model.model_fields[field].annotation, Field())
+            for field in fields
+        },
+    )
+
+
+def get_projection(table_model: BaseModel, fields: List[str] | None) -> Tuple[str, ...] | None:
+    """Validates requested fields against a table model, always keeping the `id` column.
+
+    Args:
+        table_model (BaseModel): Pydantic model for the table.
+        fields (List[str] | None): Requested fields.
+
+    Raises:
+        HTTPException: If a requested field is not a column of the table.
+
+    Returns:
+        Tuple[str, ...] | None: Fields to select, or None to select every column.
+    """
+    if not fields:
+        return None
+    model_fields = table_model.model_fields
+    invalid = [f for f in fields if f not in model_fields]
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Invalid fields: {", ".join(invalid)}'
+        )
+    if 'id' in model_fields and 'id' not in fields:
+        fields = ['id'] + fields
+    return tuple(dict.fromkeys(fields))
+
+
 def get_route_list_function(table: str, table_model: BaseModel) -> Callable:
     """Generates an enpoint function to list all items.
 
@@ -34,36 +105,73 @@ def get_route_list_function(table: str, table_model: BaseModel) -> Callable:
     def route_func_list_all(
             response: Response,
             cqp: CommonQueryParams = Depends(CommonQueryParams),
+            fields: List[str] | None = Depends(get_fields),
             db: DB = Depends(get_db)
     ):
-        query_str = query_builder(
-            table=table,
-            order_by=cqp.order_by,
-            limit=cqp.limit,
-            offset=cqp.offset,
-            filter_by=cqp.filter_by,
-        )
-        count_query_str = query_builder(
-            table=table,
-            filter_by=cqp.filter_by,
-            count_only=True
-        )
+        projection = get_projection(table_model, fields)
+        if cqp.search and table not in SEARCH_COLUMNS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f'Search is not supported on {table}!'
+            )
 
+        filter_by = cqp.validated_filter_by(table_model)
         with db.get_connection() as conn:
-            df = pd.read_sql_query(query_str, conn)
-            cur = conn.cursor()
-            cur.execute(count_query_str)
-            count = cur.fetchone()[0]
-
-        data = [
-            table_model(**item)
-            for item in df.to_dict(orient='records')
-        ]
-
-        response.headers['Access-Control-Expose-Headers'] = 'Content-Range'
-        response.headers['Content-Range'] = \
-            f'{table} {cqp.offset}-{cqp.offset + len(data) - 1}/{count}'
+            table_expr, columns, where, rank_order_by = table, None, None, []
+            if cqp.search:
+                table_expr, columns, where, rank_order_by = \
+                    search_query_parts(conn, table, cqp.search)
+            elif race_ids := get_filtered_race_ids(filter_by):
+                source = partition_source(conn, table, race_ids=race_ids)
+                table_expr = f'{source} as {table}' if source != table else table
+            if projection:
+                columns = [f'{table}.{col}' for col in projection]
+
+            with profile_phase('query_builder'):
+                query_str = query_builder(
+                    table=table_expr,
+                    columns=columns,
+                    where=where,
+                    order_by=cqp.order_by or rank_order_by,
+                    limit=cqp.limit,
+                    offset=cqp.offset,
+                    filter_by=filter_by,
+                )
+                count_query_str = query_builder(
+                    table=table_expr,
+                    where=where,
+                    filter_by=filter_by,
+                    count_only=True
+                )
+
+            with profile_phase('execute'):
+                conn.row_factory = sqlite3.Row
+                cur = conn.cursor()
+                cur.execute(query_str)
+                rows = cur.fetchall()
+                cur.execute(count_query_str)
+                count = cur.fetchone()[0]
+
+        with profile_phase('model_construction'):
+            model = get_projected_model(table_model, projection) if projection else table_model
+            data = [
+                model(**item)
+                for item in rows
+            ]
+
+        headers = {
+            'Access-Control-Expose-Headers': 'Content-Range',
+            'Content-Range': f'{table} {cqp.offset}-{cqp.offset + len(data) - 1}/{count}',
+        }
+        if projection:
+            # The trimmed model does not match the route's response_model, serialize it directly.
+            return Response(
+                content=TypeAdapter(List[model]).dump_json(data),
+                media_type='application/json',
+                headers=headers,
+            )
 
+        response.headers.update(headers)
         return data
 
     return route_func_list_all
@@ -79,14 +187,25 @@ def get_route_id_function(table: str, table_model: BaseModel) -> Callable:
     Returns:
         Callable: Endpoint function.
     """
-    def route_id_function(id: int, db: DB = Depends(get_db)):
+    def route_id_function(
+            id: int,
+            fields: List[str] | None = Depends(get_fields),
+            db: DB = Depends(get_db)
+    ):
         id_col = get_id_column_name(table)
-        with db.get_connection() as conn:
+        projection = get_projection(table_model, fields)
+        columns = ', '.join(projection) if projection else '*'
+        with db.get_connection() as conn, profile_phase('execute'):
             conn.row_factory = sqlite3.Row
             cur = conn.cursor()
-            cur.execute(f'SELECT * FROM {table} WHERE {id_col} = {id};')
+            cur.execute(f'SELECT {columns} FROM {table} WHERE {id_col} = {id};')
             item = cur.fetchone()
-        if item:
+        if item and projection:
+            return Response(
+                content=get_projected_model(table_model, projection)(**item).model_dump_json(),
+                media_type='application/json',
+            )
+        elif item:
             return table_model(**item)
         else:
             raise HTTPException(
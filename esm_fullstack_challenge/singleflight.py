@@ -0,0 +1,119 @@
+import asyncio
+import functools
+import inspect
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    """An in-flight call whose result is shared with every waiter."""
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for it and get the same result (or exception). Once the call
+    completes the key is forgotten, so later calls run again.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Hashable, asyncio.Future] = {}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """Runs `fn(*args, **kwargs)` unless a call with the same key is in flight
+        in another thread, in which case its result is awaited and returned.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    async def do_async(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """Awaits `fn(*args, **kwargs)` unless a call with the same key is in flight
+        on the same event loop, in which case its result is awaited and returned.
+        """
+        loop_key = (id(asyncio.get_running_loop()), key)
+        future = self._async_calls.get(loop_key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = self._async_calls[loop_key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieve the exception so it is not reported as never retrieved.
+            future.exception()
+            raise
+        finally:
+            del self._async_calls[loop_key]
+
+
+default_group = SingleFlight()
+
+
+def _make_key(func: Callable, args: Tuple, kwargs: Dict, exclude: Tuple[str, ...]) -> Hashable:
+    return (
+        func.__module__,
+        func.__qualname__,
+        args,
+        tuple(sorted((k, v) for k, v in kwargs.items() if k not in exclude)),
+    )
+
+
+def single_flight(group: SingleFlight | None = None, exclude: Tuple[str, ...] = ('db',)) -> Callable:
+    """Decorator coalescing concurrent calls of a function with identical arguments.
+
+    Works on both sync endpoints (run in FastAPI's threadpool) and async ones.
+
+    Args:
+        group (SingleFlight | None, optional): Group tracking in-flight calls. Defaults to a shared group.
+        exclude (Tuple[str, ...], optional): Keyword arguments left out of the key, such as
+                                             per-request dependencies. Defaults to ('db',).
+
+    Returns:
+        Callable: Decorator.
+    """
+    group = group or default_group
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = _make_key(func, args, kwargs, exclude)
+                return await group.do_async(key, func, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _make_key(func, args, kwargs, exclude)
+            return group.do(key, func, *args, **kwargs)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,268 @@
+import asyncio
+import json
+import logging
+import sqlite3
+from typing import AsyncIterator, Callable, Dict, List, Set
+
+from esm_fullstack_challenge.db import DB
+from esm_fullstack_challenge.db.partitions import partition_source
+
+
+logger = logging.getLogger('uvicorn.error')
+
+# Columns sent for each table, and the columns identifying a row within a race.
+STREAM_TABLES = {
+    'lap_times': (('driver_id', 'lap', 'position', 'milliseconds'), ('driver_id', 'lap')),
+    'pit_stops': (('driver_id', 'stop', 'lap', 'duration', 'milliseconds'), ('driver_id', 'stop')),
+}
+
+# Delay before clients reconnect after the stream drops.
+RECONNECT_DELAY_MS = 3000
+
+# Events buffered per subscriber before it is considered too slow and disconnected.
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# Consecutive failed polls after which a feed ends its streams with an error event.
+MAX_POLL_FAILURES = 5
+
+FEED_FAILED_DETAIL = 'Race updates are unavailable.'
+
+RaceUpdates = Dict[int, Dict[str, List[dict]]]
+
+
+def read_race_updates(conn: sqlite3.Connection, race_id: int, from_lap: int = 0) -> RaceUpdates:
+    """Reads a race's lap times and pit stops from a lap onwards.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection.
+        race_id (int): Race id.
+        from_lap (int, optional): First lap to read. Defaults to 0.
+
+    Returns:
+        RaceUpdates: Rows of each table grouped by lap, in lap order.
+    """
+    updates: RaceUpdates = {}
+    for table, (columns, _) in STREAM_TABLES.items():
+        cur = conn.execute(
+            f'SELECT {", ".join(columns)} '
+            f'FROM {partition_source(conn, table, race_ids=[race_id])} '
+            'WHERE race_id = ? AND lap >= ? ORDER BY lap, driver_id;',
+            (race_id, from_lap)
+        )
+        for row in cur.fetchall():
+            record = dict(zip(columns, row))
+            lap = updates.setdefault(record['lap'], {name: [] for name in STREAM_TABLES})
+            lap[table].append(record)
+    return dict(sorted(updates.items()))
+
+
+def format_event(lap: int, update: Dict[str, List[dict]]) -> str:
+    """Formats a lap's rows as a server-sent event whose id is the lap number."""
+    return f'id: {lap}\nevent: lap\ndata: {json.dumps({"lap": lap, **update})}\n\n'
+
+
+def format_error_event(detail: str) -> str:
+    """Formats an error as a server-sent event, sent before the stream is ended."""
+    return f'event: error\ndata: {json.dumps({"detail": detail})}\n\n'
+
+
+class RaceFeed:
+    """Watches one race for new lap times and pit stops and fans them out to
+    every subscribed stream.
+
+    A single poller per race checks SQLite's data_version, which only changes
+    when another connection commits, and reads the race again only then, so
+    the cost is independent of the number of subscribers. After
+    MAX_POLL_FAILURES consecutive failed polls the feed stops and ends every
+    stream with an error event.
+    """
+    def __init__(self, race_id: int, get_db: Callable[[], DB], interval: float = 1.0):
+        self.race_id = race_id
+        self.get_db = get_db
+        self.interval = interval
+        self.loop = asyncio.get_running_loop()
+        self.subscribers: Set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+        self._conn: sqlite3.Connection | None = None
+        self._db_file: str | None = None
+        self._schemas: List[str] = []
+        self._version: tuple | None = None
+        self._seen: Set[tuple] | None = None
+        # Set once the first poll recorded which rows exist; rows committed later are published.
+        # Also set when the feed failed, so streams waiting for it end.
+        self.ready = asyncio.Event()
+        self.failed = False
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+        if not self.subscribers:
+            if self._task is not None:
+                self._task.cancel()
+                self._task = None
+            if _feeds.get(self.race_id) is self:
+                del _feeds[self.race_id]
+
+    def publish(self, event: str | None):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too far behind: end its stream so the client resumes from its last lap.
+                self.subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def _run(self):
+        poll = None
+        failures = 0
+        try:
+            while True:
+                # Shielded so cancelling the feed does not abandon a poll that is still using the connection.
+                poll = asyncio.ensure_future(asyncio.to_thread(self.poll))
+                try:
+                    updates = await asyncio.shield(poll)
+                    failures = 0
+                    self.ready.set()
+                except Exception:
+                    failures += 1
+                    logger.exception(
+                        'Polling race %s for updates failed (%d/%d)', self.race_id, failures, MAX_POLL_FAILURES
+                    )
+                    self.close()
+                    if failures >= MAX_POLL_FAILURES:
+                        self.fail()
+                        return
+                    updates = {}
+                for lap, update in updates.items():
+                    self.publish(format_event(lap, update))
+                await asyncio.sleep(self.interval)
+        finally:
+            if poll is not None and not poll.done():
+                poll.add_done_callback(self._close_after_poll)
+            else:
+                self.close()
+
+    def _close_after_poll(self, poll: asyncio.Future):
+        if not poll.cancelled() and poll.exception() is not None:
+            logger.warning('Polling race %s for updates failed while stopping', self.race_id, exc_info=poll.exception())
+        self.close()
+
+    def fail(self):
+        """Ends every stream with an error event and drops the feed, so new streams start a fresh one."""
+        self.failed = True
+        self.publish(format_error_event(FEED_FAILED_DETAIL))
+        self.publish(None)
+        self.ready.set()
+        self._task = None
+        if _feeds.get(self.race_id) is self:
+            del _feeds[self.race_id]
+
+    def close(self):
+        """Closes the feed's connection; only called while no poll is using it."""
+        if self._conn is not None:
+            self._conn.close()
+        self._conn, self._version = None, None
+
+    def poll(self) -> RaceUpdates:
+        """Gets the rows written since the previous poll, if anything was committed.
+
+        The first poll only records which rows exist; subscribers read those
+        themselves when they connect.
+        """
+        db = self.get_db()
+        if self._conn is None or db.db_file != self._db_file:
+            self.close()
+            self._conn, self._db_file = db.connect(check_same_thread=False), db.db_file
+            # The main database and any attached partitions.
+            self._schemas = [row[1] for row in self._conn.execute('PRAGMA database_list;') if row[1] != 'temp']
+
+        version = tuple(
+            self._conn.execute(f'PRAGMA {schema}.data_version;').fetchone()[0] for schema in self._schemas
+        )
+        if version == self._version:
+            return {}
+        self._version = version
+
+        updates = read_race_updates(self._conn, self.race_id)
+        first_poll = self._seen is None
+        seen = self._seen if self._seen is not None else set()
+        new_updates: RaceUpdates = {}
+        for lap, update in updates.items():
+            for table, rows in update.items():
+                key_columns = STREAM_TABLES[table][1]
+                for row in rows:
+                    key = (table, *(row[column] for column in key_columns))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    new_updates.setdefault(lap, {name: [] for name in STREAM_TABLES})[table].append(row)
+        self._seen = seen
+        return {} if first_poll else new_updates
+
+
+_feeds: Dict[int, RaceFeed] = {}
+
+
+def get_race_feed(race_id: int, get_db: Callable[[], DB], interval: float = 1.0) -> RaceFeed:
+    """Gets the shared feed of a race, creating it if needed."""
+    feed = _feeds.get(race_id)
+    if feed is None or feed.loop is not asyncio.get_running_loop():
+        feed = _feeds[race_id] = RaceFeed(race_id, get_db, interval)
+    return feed
+
+
+async def race_events(
+    race_id: int,
+    from_lap: int,
+    get_db: Callable[[], DB],
+    interval: float = 1.0,
+    heartbeat: float = 15.0,
+) -> AsyncIterator[str]:
+    """Server-sent events for a race: every lap from `from_lap` on, then each
+    new lap time or pit stop as it is written, with a comment every `heartbeat`
+    seconds of silence to keep the connection open.
+
+    Laps are re-sent whole on resume and may be sent in several events while
+    they are being written, so clients should key their state by driver and lap.
+    """
+    feed = get_race_feed(race_id, get_db, interval)
+    queue = feed.subscribe()
+    try:
+        yield f'retry: {RECONNECT_DELAY_MS}\n\n'
+
+        # Read the backlog only after the feed's first poll, so every row is
+        # either in the backlog or published to the queue.
+        while not feed.ready.is_set():
+            try:
+                await asyncio.wait_for(feed.ready.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ': heartbeat\n\n'
+        if feed.failed:
+            yield format_error_event(FEED_FAILED_DETAIL)
+            return
+
+        def read_backlog():
+            with get_db().get_connection() as conn:
+                return read_race_updates(conn, race_id, from_lap)
+
+        for lap, update in (await asyncio.to_thread(read_backlog)).items():
+            yield format_event(lap, update)
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ': heartbeat\n\n'
+                continue
+            if event is None:
+                return
+            yield event
+    finally:
+        feed.unsubscribe(queue)
@@ -0,0 +1,28 @@
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+STARTUP_TIMINGS: Dict[str, float] = {}
+
+
+@contextmanager
+def timed(name: str, timings: Dict[str, float] | None = None):
+    """Context manager adding the elapsed time of its block to `timings`.
+
+    Args:
+        name (str): Name of the phase being timed.
+        timings (Dict[str, float] | None, optional): Dictionary to record into.
+                                                     Defaults to STARTUP_TIMINGS.
+    """
+    timings = STARTUP_TIMINGS if timings is None else timings
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def format_timings(timings: Dict[str, float]) -> str:
+    """Formats timings as a human readable breakdown, e.g. `models=0.012s, routes=0.034s`."""
+    return ', '.join(f'{name}={seconds:.3f}s' for name, seconds in timings.items())
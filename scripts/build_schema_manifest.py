@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+from esm_fullstack_challenge.config import DB_FILE, SCHEMA_MANIFEST
+from esm_fullstack_challenge.models.utils import write_schema_manifest
+
+
+if __name__ == "__main__":
+    print(f"Writing schema manifest of {DB_FILE} to {SCHEMA_MANIFEST}...")
+    write_schema_manifest(DB_FILE, SCHEMA_MANIFEST)
@@ -2,4 +2,9 @@
 set -e
 
 PORT="${PORT:=8000}"
-fastapi dev esm_fullstack_challenge/main.py --host 0.0.0.0 --port ${PORT}
+ENVIRONMENT="${ENVIRONMENT:=development}"
+if [ "${ENVIRONMENT}" = "production" ]; then
+  exec gunicorn esm_fullstack_challenge.main:app --config python:esm_fullstack_challenge.gunicorn_conf
+else
+  fastapi dev esm_fullstack_challenge/main.py --host 0.0.0.0 --port ${PORT}
+fi
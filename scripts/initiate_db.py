@@ -7,6 +7,16 @@ from tempfile import TemporaryDirectory
 import kagglehub
 import pandas as pd
 
+from esm_fullstack_challenge.config import DB_FILE, SCHEMA_MANIFEST, SNAPSHOT_DIR, SNAPSHOT_RETAIN
+from esm_fullstack_challenge.db.indexes import create_indexes
+from esm_fullstack_challenge.db.lapstore import export_lap_store
+from esm_fullstack_challenge.db.partitions import build_partitions
+from esm_fullstack_challenge.db.search import create_search_indexes
+from esm_fullstack_challenge.db.snapshots import new_snapshot_path, publish_snapshot
+from esm_fullstack_challenge.db.standings import build_standings
+from esm_fullstack_challenge.db.teammates import build_teammate_pairs
+from esm_fullstack_challenge.models.utils import write_schema_manifest
+
 
 TABLE_ID_MAP = {
     'circuits': {
@@ -43,8 +53,8 @@ TABLE_ID_MAP = {
 }
 
 
-def download_data():
-    conn = sqlite3.connect("data.db")
+def download_data(db_file: str):
+    conn = sqlite3.connect(db_file)
 
     with TemporaryDirectory() as tmp:
         environ["KAGGLEHUB_CACHE"] = tmp
@@ -65,7 +75,27 @@ def download_data():
             print(table_name)
             df.to_sql(table_name, conn, if_exists="replace", index=False)
 
+    print("Creating indexes...")
+    create_indexes(conn)
+    print("Building search indexes...")
+    create_search_indexes(conn)
+    print("Building championship standings...")
+    build_standings(conn)
+    print("Building teammate pairs...")
+    build_teammate_pairs(conn)
+    conn.commit()
+    print("Exporting lap store...")
+    export_lap_store(conn, db_file)
+    print("Partitioning fact tables...")
+    build_partitions(conn, db_file)
+    conn.close()
+
 
 if __name__ == "__main__":
-    print("Downloading data...")
-    download_data()
+    snapshot_file = new_snapshot_path(SNAPSHOT_DIR)
+    print(f"Downloading data to {snapshot_file}...")
+    download_data(snapshot_file)
+    print(f"Publishing snapshot as {DB_FILE}...")
+    publish_snapshot(snapshot_file, DB_FILE, retain=SNAPSHOT_RETAIN)
+    print("Writing schema manifest...")
+    write_schema_manifest(DB_FILE, SCHEMA_MANIFEST)
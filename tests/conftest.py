@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""Fixtures shared by the API tests.
+
+The app builds its models from DB_FILE when imported, so the settings point
+at a template database created here, before any test module imports the app.
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+
+import pytest
+
+from esm_fullstack_challenge.db.search import create_search_indexes
+
+
+TEST_DIR = tempfile.mkdtemp(prefix='esm-tests-')
+
+TEMPLATE_DB = os.path.join(TEST_DIR, 'data.db')
+
+ADMIN_TOKEN = 'test-token'
+
+DRIVERS = [
+    (1, 'iceman', 'RAI', 'Kimi', 'Räikkönen', 'Finnish'),
+    (2, 'hamilton', 'HAM', 'Lewis', 'Hamilton', 'British'),
+    (3, 'hulkenberg', 'HUL', 'Nico', 'Hülkenberg', 'German'),
+    (4, 'rosberg', 'ROS', 'Nico', 'Rosberg', 'German'),
+    (5, 'button', 'BUT', 'Jenson', 'Button', 'British'),
+]
+
+
+def create_template_db(db_file: str):
+    """Creates a database with drivers, the other searchable tables and races."""
+    conn = sqlite3.connect(db_file)
+    conn.executescript("""
+        CREATE TABLE drivers (id INTEGER, driver_ref TEXT, code TEXT, forename TEXT, surname TEXT, nationality TEXT);
+        CREATE TABLE constructors (id INTEGER, constructor_ref TEXT, name TEXT, nationality TEXT);
+        CREATE TABLE circuits (id INTEGER, circuit_ref TEXT, name TEXT, location TEXT, country TEXT);
+        CREATE TABLE races (id INTEGER, year INTEGER, round INTEGER, circuit_id INTEGER, name TEXT, date TEXT);
+    """)
+    conn.executemany('INSERT INTO drivers VALUES (?, ?, ?, ?, ?, ?);', DRIVERS)
+    create_search_indexes(conn)
+    conn.commit()
+    conn.close()
+
+
+create_template_db(TEMPLATE_DB)
+os.environ.update({
+    'DB_FILE': TEMPLATE_DB,
+    'SCHEMA_MANIFEST': os.path.join(TEST_DIR, 'schema.json'),
+    'PROFILE_DIR': os.path.join(TEST_DIR, 'profiles'),
+    'ADMIN_TOKEN': ADMIN_TOKEN,
+})
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def drivers_db(tmp_path):
+    """Copy of the template database for a test to read and write."""
+    db_file = str(tmp_path / 'data.db')
+    shutil.copy(TEMPLATE_DB, db_file)
+    return db_file
+
+
+@pytest.fixture
+def client(drivers_db):
+    """Client of the app serving `drivers_db`."""
+    from fastapi.testclient import TestClient
+
+    from esm_fullstack_challenge.db import DB
+    from esm_fullstack_challenge.dependencies import get_db
+    from esm_fullstack_challenge.main import app
+
+    app.dependency_overrides[get_db] = lambda: DB(drivers_db)
+    yield TestClient(app)
+    app.dependency_overrides.clear()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""Tests for admission control."""
+import asyncio
+
+import pytest
+
+from esm_fullstack_challenge.dependencies import CommonQueryParams
+from esm_fullstack_challenge.middleware.admission import AdmissionControlMiddleware, ConcurrencyLimiter, Rejected
+
+
+def test_limiter_queues_then_sheds():
+    """Test that the limiter hands slots to queued requests and rejects the rest."""
+    async def scenario():
+        limiter = ConcurrencyLimiter('test', limit=1, queue_size=1, timeout=0.05)
+        await limiter.acquire()
+
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected) as full:
+            await limiter.acquire()
+        assert full.value.status_code == 429
+
+        limiter.release()
+        await queued
+        assert (limiter.active, limiter.queued) == (1, 0)
+
+        with pytest.raises(Rejected) as timed_out:
+            await limiter.acquire()
+        assert timed_out.value.status_code == 503
+        assert limiter.queued == 0
+
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize('path, expected', [
+    ('/ping', None),
+    ('/races/1/stream', None),
+    ('/races/race_circuit_summary/1', 'expensive'),
+    ('/races/season_stints/2020', 'expensive'),
+    ('/races/1/stints', 'expensive'),
+    ('/standings/2020', 'expensive'),
+    ('/drivers/1/head_to_head', 'expensive'),
+    ('/drivers/1', 'cheap'),
+    ('/results', 'cheap'),
+])
+def test_classify(path, expected):
+    """Test that routes are sorted into the right class."""
+    assert AdmissionControlMiddleware(None).classify(path) == expected
+
+
+@pytest.mark.parametrize('range_param, expected', [
+    ('[0, 24]', 25),
+    ('[0, 999999]', 1000),
+    (None, 1000),
+    ('[10, 5]', 0),
+])
+def test_range_is_capped(range_param, expected):
+    """Test that the page size is capped at MAX_PAGE_SIZE."""
+    assert CommonQueryParams('{}', range_param, None).limit == expected
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""Tests for `esm_fullstack_challenge.middleware.compression`."""
+import json
+import sqlite3
+
+import pytest
+
+from esm_fullstack_challenge.config import COMPRESSION_MIN_SIZE
+from esm_fullstack_challenge.db import DB
+from esm_fullstack_challenge.middleware.compression import CompressedBodyCache, negotiate_encoding
+
+
+@pytest.mark.parametrize('accept_encoding, expected', [
+    ('gzip, deflate, br, zstd', 'zstd'),
+    ('gzip;q=1.0, br;q=0.5', 'gzip'),
+    ('br;q=0.5, gzip;q=0.8, zstd;q=0', 'gzip'),
+    ('*', 'zstd'),
+    ('*;q=0.1, br', 'br'),
+    ('identity', None),
+    ('gzip;q=0', None),
+    ('', None),
+])
+def test_negotiate_encoding(accept_encoding, expected):
+    """Test that the client's most preferred available encoding is chosen."""
+    assert negotiate_encoding(accept_encoding, ['zstd', 'br', 'gzip']) == expected
+
+
+def test_compressed_body_cache_evicts_least_recently_used():
+    """Test that the cache stays within its size bound."""
+    cache = CompressedBodyCache(max_bytes=10)
+    cache.set(('gzip', b'a'), b'12345')
+    cache.set(('gzip', b'b'), b'12345')
+    cache.get(('gzip', b'a'))
+    cache.set(('gzip', b'c'), b'12345')
+    assert cache.get(('gzip', b'a')) == b'12345'
+    assert cache.get(('gzip', b'b')) is None
+    assert cache.size == 10
+
+
+@pytest.fixture
+def race_client(client, drivers_db):
+    """Client of the app serving a database with many drivers and the laps and pit stops of one race."""
+    conn = sqlite3.connect(drivers_db)
+    conn.executemany(
+        'INSERT INTO drivers VALUES (?, ?, ?, ?, ?, ?);',
+        [(i, f'driver_{i}', f'D{i:02}', 'Test', f'Driver {i}', 'Testish') for i in range(10, 60)]
+    )
+    conn.execute("INSERT INTO races VALUES (1, 2020, 1, 1, 'Test Grand Prix', '2020-07-05');")
+    conn.execute('CREATE TABLE lap_times (race_id INTEGER, driver_id INTEGER, lap INTEGER, '
+                 'position INTEGER, time TEXT, milliseconds INTEGER);')
+    conn.execute('CREATE TABLE pit_stops (race_id INTEGER, driver_id INTEGER, stop INTEGER, lap INTEGER, '
+                 'time TEXT, duration TEXT, milliseconds INTEGER);')
+    conn.executemany(
+        'INSERT INTO lap_times VALUES (1, ?, ?, ?, NULL, ?);',
+        [(d, lap, d, 90000 + 100 * d + lap * (lap % 7)) for d in range(10, 30) for lap in range(1, 41)]
+    )
+    conn.executemany(
+        "INSERT INTO pit_stops VALUES (1, ?, ?, ?, NULL, '22.0', 22000);",
+        [(d, stop, lap) for d in range(10, 30) for stop, lap in enumerate((12 + d % 5, 26 + d % 3), start=1)]
+    )
+    conn.commit()
+    conn.close()
+    return client
+
+
+def test_large_json_is_compressed(race_client):
+    """Test that a large JSON response is gzipped, varies on Accept-Encoding and decodes to the same body."""
+    plain = race_client.get('/drivers', headers={'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in plain.headers and len(plain.content) > COMPRESSION_MIN_SIZE
+
+    response = race_client.get('/drivers', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['vary']
+    assert int(response.headers['content-length']) < len(plain.content)
+    assert response.json() == plain.json()
+
+
+def test_small_response_is_not_compressed(race_client):
+    """Test that responses below the size threshold are sent as is."""
+    response = race_client.get('/drivers/1', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert len(response.content) < COMPRESSION_MIN_SIZE
+    assert 'content-encoding' not in response.headers
+
+
+def test_streaming_response_is_not_compressed(race_client, drivers_db, monkeypatch):
+    """Test that streamed bodies, sent in several messages, pass through uncompressed."""
+    chunks = ['retry: 3000\n\n', f'id: 1\nevent: lap\ndata: {json.dumps({"lap": 1, "pad": "x" * 4096})}\n\n']
+
+    async def events(*args, **kwargs):
+        for chunk in chunks:
+            yield chunk
+
+    monkeypatch.setattr('esm_fullstack_challenge.routers.races.get_stream_db', lambda: DB(drivers_db))
+    monkeypatch.setattr('esm_fullstack_challenge.routers.races.race_events', events)
+    response = race_client.get('/races/1/stream', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'content-encoding' not in response.headers
+    assert response.text == ''.join(chunks)
+
+
+def test_columns_series_format_is_compressed(race_client):
+    """Test that `series_format=columns` output is compressed and decodes to the same columns."""
+    url = '/races/1/stints?series_format=columns'
+    plain = race_client.get(url, headers={'Accept-Encoding': 'identity'})
+    response = race_client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['content-encoding'] == 'gzip'
+    stints = response.json()['stints']
+    assert stints == plain.json()['stints']
+    assert set(stints['driver_id']) == set(range(10, 30)) and len(stints['stint']) == 60
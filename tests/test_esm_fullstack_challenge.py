@@ -1,5 +1,8 @@
 #!/usr/bin/env python
 """Tests for `esm_fullstack_challenge` package."""
+import subprocess
+import sys
+
 import pytest
 
 import esm_fullstack_challenge
@@ -16,3 +19,9 @@ def test_has_metadata():
     assert hasattr(esm_fullstack_challenge, '__author__')
     assert hasattr(esm_fullstack_challenge, '__email__')
     assert hasattr(esm_fullstack_challenge, '__version__')
+
+
+def test_app_import_does_not_load_numpy():
+    """Test that NumPy is only loaded by the lap analytics, not when the app is imported."""
+    code = 'import sys, esm_fullstack_challenge.main; sys.exit("numpy" in sys.modules)'
+    assert subprocess.run([sys.executable, '-c', code]).returncode == 0
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""Tests for column projection with the `fields` parameter."""
+import pytest
+
+
+@pytest.mark.parametrize('fields', ['surname,code', '["surname", "code"]'])
+def test_list_projection(client, fields):
+    """Test that the list route returns the requested columns plus the id."""
+    response = client.get('/drivers', params={'fields': fields, 'sort': '["id", "asc"]', 'range': '[0, 1]'})
+    assert response.status_code == 200
+    assert response.json() == [
+        {'id': 1, 'surname': 'Räikkönen', 'code': 'RAI'},
+        {'id': 2, 'surname': 'Hamilton', 'code': 'HAM'},
+    ]
+    assert response.headers['Content-Range'] == 'drivers 0-1/5'
+
+
+def test_id_projection(client):
+    """Test that the id route returns the requested columns plus the id."""
+    response = client.get('/drivers/3', params={'fields': 'forename'})
+    assert response.status_code == 200
+    assert response.json() == {'id': 3, 'forename': 'Nico'}
+    assert client.get('/drivers/3').json()['surname'] == 'Hülkenberg'
+
+
+def test_projection_with_search(client):
+    """Test that projection applies to search results."""
+    response = client.get('/drivers', params={'fields': 'surname', 'filter': '{"q": "nico"}', 'sort': '["id", "asc"]'})
+    assert response.status_code == 200
+    assert response.json() == [{'id': 3, 'surname': 'Hülkenberg'}, {'id': 4, 'surname': 'Rosberg'}]
+
+
+@pytest.mark.parametrize('path, fields', [
+    ('/drivers', 'surname,team'),
+    ('/drivers/1', 'team'),
+    ('/drivers', '[bad'),
+    ('/drivers', '["surname"'),
+    ('/drivers/1', '[1, 2'),
+])
+def test_invalid_fields(client, path, fields):
+    """Test that unknown columns and malformed lists are rejected."""
+    response = client.get(path, params={'fields': fields})
+    assert response.status_code == 400
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Tests for the filter grammar of `CommonQueryParams`."""
+import json
+import sqlite3
+
+import pytest
+from fastapi import HTTPException
+
+from esm_fullstack_challenge.db import query_builder
+from esm_fullstack_challenge.db.indexes import create_indexes
+from esm_fullstack_challenge.dependencies import CommonQueryParams
+from esm_fullstack_challenge.models.utils import autogen_models
+
+
+@pytest.fixture
+def races_db(tmp_path):
+    """SQLite DB with an indexed races table."""
+    db_file = str(tmp_path / 'data.db')
+    conn = sqlite3.connect(db_file)
+    conn.execute('CREATE TABLE races (id INTEGER, year INTEGER, round INTEGER, name TEXT, time TEXT);')
+    conn.executemany(
+        'INSERT INTO races VALUES (?, ?, ?, ?, ?);',
+        [
+            (i, 2000 + i % 25, i % 20, f'{"Monaco" if i % 2 else "Monza"} GP {i}', '\\N' if i % 3 else '14:00')
+            for i in range(1, 501)
+        ]
+    )
+    create_indexes(conn)
+    conn.commit()
+    yield conn, autogen_models(db_file)['races']
+    conn.close()
+
+
+def build_query(table_model, filter_dict):
+    cqp = CommonQueryParams(json.dumps(filter_dict), None, None)
+    return query_builder(table='races', filter_by=cqp.validated_filter_by(table_model))
+
+
+@pytest.mark.parametrize('filter_dict, expected_count', [
+    ({'year_gte': 2020}, 100),
+    ({'year_gte': 2020.0}, 100),
+    ({'year_gt': 2020, 'year_lte': 2022}, 40),
+    ({'year_between': [2010, 2011]}, 40),
+    ({'year': '2010'}, 20),
+    ({'name_like': 'Monaco'}, 250),
+    ({'time_null': True}, 334),
+    ({'time_null': False}, 166),
+    ({'id': [1, 2, 3], 'year_neq': 2001}, 2),
+])
+def test_filter_results(races_db, filter_dict, expected_count):
+    """Test that filter operators select the expected rows."""
+    conn, table_model = races_db
+    rows = conn.execute(build_query(table_model, filter_dict)).fetchall()
+    assert len(rows) == expected_count
+
+
+@pytest.mark.parametrize('filter_dict, index', [
+    ({'year_gte': 2020}, 'idx_races_year_round'),
+    ({'year_between': [2010, 2011]}, 'idx_races_year_round'),
+    ({'year': 2010, 'round_lt': 5}, 'idx_races_year_round'),
+    ({'name_like': 'Monaco'}, 'idx_races_name'),
+])
+def test_filter_query_plan_uses_index(races_db, filter_dict, index):
+    """Test that compiled filters are sargable."""
+    conn, table_model = races_db
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_races_name ON races (name);')
+    plan = conn.execute('EXPLAIN QUERY PLAN ' + build_query(table_model, filter_dict)).fetchall()
+    details = ' '.join(row[-1] for row in plan)
+    assert f'SEARCH races USING INDEX {index}' in details
+
+
+@pytest.mark.parametrize('filter_dict', [
+    {'season_gte': 2010},
+    {'year_between': 2010},
+    {'year_gte': 'twenty ten'},
+    {'year_gte': 2010.5},
+    {'id': [1, 2.5]},
+    {'year_between': [2010, 2010.9]},
+    {'year_like': 20},
+    {'id_like': '1'},
+    {'time_null': 'false'},
+    {'time_null': 1},
+])
+def test_invalid_filters(races_db, filter_dict):
+    """Test that invalid filters are rejected."""
+    _, table_model = races_db
+    with pytest.raises(HTTPException) as exc_info:
+        build_query(table_model, filter_dict)
+    assert exc_info.value.status_code == 400
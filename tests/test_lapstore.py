@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""Tests for the memory-mapped lap store."""
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+from esm_fullstack_challenge.db import DB
+from esm_fullstack_challenge.db.lapstore import LAP_COLUMNS, export_lap_store, get_lap_store, read_race_laps, \
+    stored_races
+from esm_fullstack_challenge.db.partitions import build_partitions
+from esm_fullstack_challenge.db.snapshots import new_snapshot_path, publish_snapshot
+
+
+@pytest.fixture
+def laps_db(tmp_path):
+    """SQLite DB with shuffled lap times for three races."""
+    db_file = str(tmp_path / 'data.db')
+    conn = sqlite3.connect(db_file)
+    conn.execute(
+        'CREATE TABLE lap_times (race_id INTEGER, driver_id INTEGER, lap INTEGER, '
+        'position INTEGER, time TEXT, milliseconds INTEGER);'
+    )
+    rows = [
+        (race_id, driver_id, lap, driver_id, None, 90000 + race_id * 100 + driver_id * 10 + lap)
+        for race_id in (3, 1, 7) for driver_id in (2, 1) for lap in (2, 1, 3)
+    ]
+    conn.executemany('INSERT INTO lap_times VALUES (?, ?, ?, ?, ?, ?);', rows)
+    conn.commit()
+    yield db_file, conn
+    conn.close()
+
+
+def test_store_matches_sqlite(laps_db):
+    """Test that race slices of the store match the laps read from SQLite."""
+    db_file, conn = laps_db
+    assert get_lap_store(DB(db_file)) is None
+    export_lap_store(conn, db_file)
+    store = get_lap_store(DB(db_file))
+
+    for race_id in (1, 3, 7, 5):
+        from_store = read_race_laps(conn, race_id, store)
+        from_sqlite = read_race_laps(conn, race_id)
+        for column in LAP_COLUMNS:
+            np.testing.assert_array_equal(from_store[column], from_sqlite[column])
+    assert isinstance(store.columns['milliseconds'], np.memmap)
+    assert list(store.race_laps(3)['lap']) == [1, 2, 3, 1, 2, 3]
+
+
+def test_store_pruned_with_snapshot(laps_db, tmp_path):
+    """Test that a snapshot's lap store is removed along with the snapshot."""
+    _, conn = laps_db
+    db_file = str(tmp_path / 'current.db')
+    first = new_snapshot_path(str(tmp_path / 'snapshots'))
+    conn.execute(f"VACUUM INTO '{first}';")
+    export_lap_store(conn, first)
+    publish_snapshot(first, db_file, retain=1)
+    assert get_lap_store(DB(db_file)).directory == first[:-len('.db')] + '.laps'
+
+    second = new_snapshot_path(str(tmp_path / 'snapshots'))
+    conn.execute(f"VACUUM INTO '{second}';")
+    publish_snapshot(second, db_file, retain=1)
+    assert not os.path.exists(first[:-len('.db')] + '.laps')
+    assert get_lap_store(DB(db_file)) is None
+
+
+def test_changed_races_read_from_sqlite(laps_db):
+    """Test that races whose laps changed after the export are read from SQLite."""
+    db_file, conn = laps_db
+    export_lap_store(conn, db_file)
+    store = get_lap_store(DB(db_file))
+    conn.execute('UPDATE lap_times SET milliseconds = 1 WHERE race_id = 3 AND lap = 2;')
+    conn.execute('INSERT INTO lap_times VALUES (5, 1, 1, 1, NULL, 95000);')
+
+    assert stored_races(conn, store, [1, 3, 5, 7]) == {1, 7}
+    assert list(read_race_laps(conn, 3, store)['milliseconds']) == [90311, 1, 90313, 90321, 1, 90323]
+    assert list(read_race_laps(conn, 5, store)['milliseconds']) == [95000]
+
+
+def test_changes_tracked_through_partitions(laps_db):
+    """Test that writes through the partition views mark their races as changed."""
+    db_file, conn = laps_db
+    conn.execute('CREATE TABLE races (id INTEGER, year INTEGER);')
+    conn.executemany('INSERT INTO races VALUES (?, ?);', [(1, 1995), (3, 2005), (7, 2015)])
+    conn.commit()
+    export_lap_store(conn, db_file)
+    build_partitions(conn, db_file)
+    store = get_lap_store(DB(db_file))
+    assert stored_races(conn, store, [1, 3, 7]) == {1, 3, 7}
+
+    with DB(db_file).get_connection() as partitioned:
+        partitioned.execute('DELETE FROM lap_times WHERE race_id = 7 AND lap = 3;')
+        assert stored_races(partitioned, store, [1, 3, 7]) == {1, 3}
+        assert list(read_race_laps(partitioned, 7, store)['lap']) == [1, 2, 1, 2]
@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+"""Tests for the schema manifest the models are generated from."""
+import json
+import sqlite3
+
+from esm_fullstack_challenge.models.utils import load_schema_manifest, write_schema_manifest
+
+
+def create_db(db_file, column_type):
+    """Creates a database with a drivers table whose code column has `column_type`."""
+    conn = sqlite3.connect(db_file)
+    conn.execute(f'CREATE TABLE drivers (id INTEGER, code {column_type});')
+    conn.close()
+
+
+def test_manifest_matches_schema(tmp_path):
+    """Test that the manifest is used for the database it was written for, and ignored for another schema
+    that has the same schema version."""
+    db_file, manifest_file = str(tmp_path / 'data.db'), str(tmp_path / 'schema.json')
+    create_db(db_file, 'TEXT')
+    write_schema_manifest(db_file, manifest_file)
+    with open(manifest_file) as f:
+        manifest = json.load(f)
+    manifest['tables']['drivers']['code'] = 'FROM MANIFEST'
+    with open(manifest_file, 'w') as f:
+        json.dump(manifest, f)
+    assert load_schema_manifest(db_file, manifest_file) == {'drivers': {'id': 'INTEGER', 'code': 'FROM MANIFEST'}}
+
+    (tmp_path / 'data.db').unlink()
+    create_db(db_file, 'INTEGER')
+    assert load_schema_manifest(db_file, manifest_file) == {'drivers': {'id': 'INTEGER', 'code': 'INTEGER'}}
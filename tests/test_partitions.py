@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""Tests for decade-partitioned fact tables."""
+import sqlite3
+
+import pytest
+
+from esm_fullstack_challenge.db import DB
+from esm_fullstack_challenge.db.partitions import build_partitions, partition_source
+from esm_fullstack_challenge.models.utils import autogen_models
+
+
+@pytest.fixture
+def partitioned_db(tmp_path):
+    """Partitioned SQLite DB with races in three decades."""
+    db_file = str(tmp_path / 'data.db')
+    conn = sqlite3.connect(db_file)
+    conn.execute('CREATE TABLE races (id INTEGER, year INTEGER, round INTEGER);')
+    conn.execute('CREATE TABLE results (id INTEGER, race_id INTEGER, driver_id INTEGER, points REAL);')
+    conn.execute('CREATE TABLE lap_times (race_id INTEGER, driver_id INTEGER, lap INTEGER, milliseconds INTEGER);')
+    conn.executemany('INSERT INTO races VALUES (?, ?, 1);', [(1, 1995), (2, 2005), (3, 2006), (4, 2015)])
+    conn.executemany(
+        'INSERT INTO results VALUES (?, ?, ?, ?);',
+        [(i, race_id, driver_id, driver_id) for i, (race_id, driver_id) in
+         enumerate(((r, d) for r in (1, 2, 3, 4) for d in (1, 2)), start=1)]
+    )
+    conn.executemany(
+        'INSERT INTO lap_times VALUES (?, ?, ?, ?);',
+        [(r, d, lap, 90000 + lap) for r in (1, 2, 3, 4) for d in (1, 2) for lap in (1, 2, 3)]
+    )
+    conn.commit()
+    expected_schema = autogen_models(db_file)['results'].model_fields
+    build_partitions(conn, db_file)
+    conn.close()
+    yield db_file, expected_schema
+
+
+def test_partitions_are_unified(partitioned_db):
+    """Test that partitioned tables read the same as before through the views."""
+    db_file, expected_schema = partitioned_db
+    with DB(db_file, read_only=True).get_connection() as conn:
+        assert conn.execute('SELECT count(*) FROM main.results;').fetchone() == (0,)
+        assert conn.execute('SELECT count(*) FROM results;').fetchone() == (8,)
+        assert conn.execute('SELECT count(*) FROM lap_times WHERE race_id = 3;').fetchone() == (6,)
+        assert conn.execute("SELECT count(*) FROM sqlite_temp_master WHERE name = 'pit_stops';").fetchone() == (0,)
+        assert [row[1] for row in conn.execute('PRAGMA database_list;')][2:] == ['p1990', 'p2000', 'p2010']
+
+    models = autogen_models(db_file)
+    assert models['results'].model_fields.keys() == expected_schema.keys()
+    assert 'pit_stops' not in models and '_partitions' not in models
+
+
+@pytest.mark.parametrize('kwargs, expected', [
+    ({}, 'results'),
+    ({'race_ids': [2]}, 'p2000.results_p2000'),
+    ({'race_ids': [2, 3]}, 'p2000.results_p2000'),
+    ({'race_ids': [1, 4]}, '(SELECT * FROM p1990.results_p1990 UNION ALL SELECT * FROM p2010.results_p2010)'),
+    ({'years': [2015]}, 'p2010.results_p2010'),
+    ({'race_ids': [99]}, 'results'),
+])
+def test_partition_pruning(partitioned_db, kwargs, expected):
+    """Test that queries are narrowed to the partitions holding the requested races."""
+    db_file, _ = partitioned_db
+    with DB(db_file).get_connection() as conn:
+        source = partition_source(conn, 'results', **kwargs)
+        assert source == expected
+        assert conn.execute(f'SELECT count(*) FROM {source} r WHERE r.race_id = 2;').fetchone()[0] == (
+            2 if '2000' in source or source == 'results' else 0
+        )
+
+
+def test_writes_are_routed_to_partitions(partitioned_db):
+    """Test that writes through the views land in, and move between, the partitions of their races."""
+    db_file, _ = partitioned_db
+    with DB(db_file).get_connection() as conn:
+        conn.execute('INSERT INTO results VALUES (9, 4, 3, 5);')
+        conn.execute('UPDATE results SET points = 7 WHERE id = 1;')
+        conn.execute('UPDATE results SET race_id = 4 WHERE id = 3;')
+        conn.execute('DELETE FROM results WHERE id = 2;')
+        with pytest.raises(sqlite3.IntegrityError, match='no partition'):
+            conn.execute('INSERT INTO results VALUES (10, 99, 1, 1);')
+
+    with DB(db_file, read_only=True).get_connection() as conn:
+        assert conn.execute('SELECT count(*) FROM main.results;').fetchone() == (0,)
+        assert conn.execute('SELECT id, points FROM p1990.results_p1990;').fetchall() == [(1, 7.0)]
+        assert conn.execute('SELECT id FROM p2000.results_p2000 ORDER BY id;').fetchall() == [(4,), (5,), (6,)]
+        assert conn.execute('SELECT id FROM p2010.results_p2010 ORDER BY id;').fetchall() == [(3,), (7,), (8,), (9,)]
+
+
+def test_missing_partition_is_an_error(partitioned_db, tmp_path):
+    """Test that a missing partition file fails loudly instead of being attached empty."""
+    db_file, _ = partitioned_db
+    (tmp_path / 'data.p2000.sqlite').unlink()
+    for read_only in (False, True):
+        with pytest.raises(FileNotFoundError, match='p2000'):
+            DB(db_file, read_only=read_only).connect()
+    assert not (tmp_path / 'data.p2000.sqlite').exists()
+
+
+def test_connections_are_reused(partitioned_db):
+    """Test that a thread reuses its connection, with the partitions attached once."""
+    db_file, _ = partitioned_db
+    db = DB(db_file)
+    with db.get_connection() as conn:
+        conn.row_factory = sqlite3.Row
+        with db.get_connection() as nested:
+            assert nested is not conn
+            assert nested.execute('SELECT count(*) FROM results;').fetchone() == (8,)
+    with db.get_connection() as again:
+        assert again is conn and again.row_factory is None
+        assert again.execute("SELECT count(*) FROM sqlite_temp_master WHERE type = 'view';").fetchone() == (2,)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""Tests for request profiling."""
+import os
+
+from esm_fullstack_challenge.config import ADMIN_TOKEN
+from esm_fullstack_challenge.profiling import ProfileStore, RequestProfile
+
+
+def test_requested_profile(client):
+    """Test that a request sending the token gets phase timings and a stored profile."""
+    assert 'Server-Timing' not in client.get('/drivers').headers
+    assert 'Server-Timing' not in client.get('/drivers', params={'profile': ADMIN_TOKEN}).headers
+
+    response = client.get('/drivers', headers={'X-Profile': ADMIN_TOKEN})
+    assert response.status_code == 200
+    phases = [metric.split(';')[0] for metric in response.headers['Server-Timing'].split(', ')]
+    for phase in ('common_query_params', 'query_builder', 'execute', 'model_construction', 'serialization'):
+        assert phase in phases
+    profile_id = response.headers['X-Profile-Id']
+
+    profiles = client.get('/admin/profiles', headers={'X-Admin-Token': ADMIN_TOKEN}).json()
+    assert profiles[0]['id'] == profile_id
+    assert profiles[0]['path'] == '/drivers' and profiles[0]['trigger'] == 'requested'
+    profile = client.get(f'/admin/profiles/{profile_id}', headers={'X-Admin-Token': ADMIN_TOKEN}).json()
+    assert profile['top_functions']
+
+
+def test_store_keeps_most_recent(tmp_path):
+    """Test that pruning keeps the `retain` most recent profiles and their stats."""
+    store = ProfileStore(str(tmp_path), retain=10)
+    profiles = [RequestProfile('GET', '/drivers', 'sampled') for _ in range(3)]
+    for mtime, profile in enumerate(profiles, start=1):
+        store.save(profile)
+        open(tmp_path / f'{profile.id}.prof', 'wb').close()
+        os.utime(tmp_path / f'{profile.id}.json', (mtime, mtime))
+
+    store.retain = 2
+    store.prune()
+    assert sorted(os.listdir(tmp_path)) == sorted(f'{p.id}.{ext}' for p in profiles[1:] for ext in ('json', 'prof'))
+    assert [p['id'] for p in store.list()] == [profiles[2].id, profiles[1].id]
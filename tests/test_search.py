@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""Tests for full-text search with the `q` filter."""
+import json
+import sqlite3
+
+import pytest
+
+
+def search(client, q, **filters):
+    response = client.get('/drivers', params={'filter': json.dumps({'q': q, **filters}), 'sort': '["id", "asc"]'})
+    assert response.status_code == 200
+    return [row['id'] for row in response.json()]
+
+
+@pytest.mark.parametrize('q, expected', [
+    ('raik', [1]),
+    ('Räikkönen', [1]),
+    ('hulk', [3]),
+    ('nico german', [3, 4]),
+    ('ni ros', [4]),
+    ('brit', [2, 5]),
+    ('schumacher', []),
+])
+def test_prefix_search(client, q, expected):
+    """Test that every word matches the prefix of a word, ignoring case and diacritics."""
+    assert search(client, q) == expected
+
+
+def test_index_follows_writes(client, drivers_db):
+    """Test that the index is kept in sync with inserts, updates and deletes."""
+    conn = sqlite3.connect(drivers_db)
+    conn.execute("INSERT INTO drivers VALUES (6, 'perez', 'PER', 'Sergio', 'Pérez', 'Mexican');")
+    conn.commit()
+    assert search(client, 'pere') == [6]
+
+    conn.execute("UPDATE drivers SET surname = 'Grosjean', nationality = 'French' WHERE id = 4;")
+    conn.commit()
+    assert search(client, 'german') == [3]
+    assert search(client, 'grosj') == [4]
+
+    conn.execute('DELETE FROM drivers WHERE id = 3;')
+    conn.commit()
+    conn.close()
+    assert search(client, 'nico') == [4]
+
+
+def test_search_with_filters_and_pagination(client):
+    """Test that search combines with other filters, sorting and range."""
+    assert search(client, 'german', id_gt=3) == [4]
+    assert search(client, 'british', nationality='British', code_like='B') == [5]
+
+    response = client.get('/drivers', params={'filter': '{"q": "b"}', 'sort': '["id", "desc"]', 'range': '[1, 1]'})
+    assert [row['id'] for row in response.json()] == [2]
+    assert response.headers['Content-Range'] == 'drivers 1-1/2'
+
+
+def test_like_fallback_without_index(client, drivers_db):
+    """Test that search falls back to substring matching when the index is missing."""
+    conn = sqlite3.connect(drivers_db)
+    conn.executescript('DROP TABLE _fts_drivers;')
+    conn.close()
+    assert search(client, 'osber') == [4]
+    assert search(client, 'nico german') == [3, 4]
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""Tests for `esm_fullstack_challenge.singleflight`."""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from esm_fullstack_challenge.singleflight import SingleFlight, single_flight
+
+
+def test_concurrent_calls_are_coalesced():
+    """Test that concurrent calls with the same arguments run once."""
+    calls = []
+    group = SingleFlight()
+
+    @single_flight(group)
+    def summary(race_id, db=None):
+        calls.append(race_id)
+        time.sleep(0.2)
+        return {'race_id': race_id}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: summary(race_id=1 if i < 6 else 2, db=object()), range(8)))
+
+    assert sorted(calls) == [1, 2]
+    assert results[0] is results[5]
+    assert results[6] == {'race_id': 2}
+    assert summary(race_id=1) is not results[0]
+
+
+def test_errors_are_shared():
+    """Test that waiters get the exception raised by the in-flight call."""
+    group = SingleFlight()
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError('boom')
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(group.do, 'key', fail)
+        started.wait()
+        follower = pool.submit(group.do, 'key', fail)
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+
+def test_async_calls_are_coalesced():
+    """Test that concurrent coroutines with the same arguments run once."""
+    calls = []
+
+    @single_flight(SingleFlight())
+    async def summary(race_id):
+        calls.append(race_id)
+        await asyncio.sleep(0.05)
+        return race_id * 10
+
+    async def main():
+        return await asyncio.gather(*(summary(race_id=1) for _ in range(5)))
+
+    assert asyncio.run(main()) == [10] * 5
+    assert calls == [1]
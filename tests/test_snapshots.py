@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""Tests for publishing and switching between database snapshots."""
+import os
+import sqlite3
+
+import pytest
+
+from esm_fullstack_challenge.db import dimensions, lapstore, snapshots as snapshots_module
+from esm_fullstack_challenge.db.dimensions import DIMENSION_TABLES
+from esm_fullstack_challenge.db.snapshots import SnapshotManager, new_snapshot_path, publish_snapshot
+
+
+def build_snapshot(snapshot_dir, name, columns='id INTEGER, name TEXT'):
+    """Creates a snapshot with one driver called `name`, and a circuit of the same name."""
+    path = new_snapshot_path(str(snapshot_dir))
+    conn = sqlite3.connect(path)
+    conn.execute(f'CREATE TABLE drivers ({columns});')
+    conn.execute('INSERT INTO drivers (id, name) VALUES (1, ?);', (name,))
+    for table in DIMENSION_TABLES:
+        conn.execute(f'CREATE TABLE {table} (id INTEGER, name TEXT);')
+    conn.execute('INSERT INTO circuits VALUES (1, ?);', (name,))
+    conn.commit()
+    conn.close()
+    return path
+
+
+def read_name(db):
+    with db.get_connection() as conn:
+        return conn.execute('SELECT name FROM drivers;').fetchone()[0]
+
+
+@pytest.fixture
+def snapshots(tmp_path, monkeypatch):
+    """Snapshot directory and a published first snapshot, with a manager checking on every call."""
+    # Swaps reload the dimensions the app caches, which other tests must not see.
+    monkeypatch.setattr('esm_fullstack_challenge.db.dimensions._dimensions', {})
+    snapshot_dir, db_file = tmp_path / 'snapshots', str(tmp_path / 'data.db')
+    first = build_snapshot(snapshot_dir, 'first')
+    publish_snapshot(first, db_file)
+    return snapshot_dir, db_file, SnapshotManager(db_file, check_interval=0)
+
+
+def test_swap_on_next_request(snapshots):
+    """Test that the snapshot published last is used from the next request on."""
+    snapshot_dir, db_file, manager = snapshots
+    assert read_name(manager.current().db) == 'first'
+
+    second = build_snapshot(snapshot_dir, 'second')
+    publish_snapshot(second, db_file)
+    assert os.path.realpath(db_file) == os.path.realpath(second)
+    assert manager.current().path == os.path.realpath(second)
+    assert read_name(manager.current().db) == 'second'
+
+
+def test_in_flight_requests_drain(snapshots):
+    """Test that requests keep their snapshot across a swap and are counted until they finish."""
+    snapshot_dir, db_file, manager = snapshots
+    with manager.acquire() as db:
+        assert manager.status()['current']['active_requests'] == 1
+        publish_snapshot(build_snapshot(snapshot_dir, 'second'), db_file)
+        with manager.acquire() as new_db:
+            status = manager.status()
+            assert status['current']['active_requests'] == 1
+            assert [s['active_requests'] for s in status['draining']] == [1]
+            assert (read_name(db), read_name(new_db)) == ('first', 'second')
+
+    status = manager.status()
+    assert status['current']['active_requests'] == 0
+    assert status['draining'] == []
+
+
+def test_schema_change_is_refused(snapshots):
+    """Test that a snapshot with a different schema is not switched to."""
+    snapshot_dir, db_file, manager = snapshots
+    first = manager.current()
+    publish_snapshot(build_snapshot(snapshot_dir, 'second', 'id INTEGER, name TEXT, code TEXT'), db_file)
+    assert manager.refresh() is False
+    assert manager.current() is first
+    assert read_name(manager.current().db) == 'first'
+
+
+def test_failing_swap_callback_is_logged(snapshots, monkeypatch, caplog):
+    """Test that a raising swap callback is logged and neither stops the swap nor the other callbacks."""
+    snapshot_dir, db_file, manager = snapshots
+    assert dimensions.get_dimension('circuits', manager.current().db)[1]['name'] == 'first'
+    lapstore._stores[('stale', 0)] = None
+
+    def failing_callback(db):
+        raise RuntimeError('cache refresh failed')
+
+    callbacks = [failing_callback, *snapshots_module._swap_callbacks]
+    assert {dimensions.load_dimensions, lapstore.clear_lap_stores} <= set(callbacks)
+    monkeypatch.setattr(snapshots_module, '_swap_callbacks', callbacks)
+
+    publish_snapshot(build_snapshot(snapshot_dir, 'second'), db_file)
+    assert manager.refresh() is True
+    assert read_name(manager.current().db) == 'second'
+    assert dimensions.get_dimension('circuits', manager.current().db)[1]['name'] == 'second'
+    assert ('stale', 0) not in lapstore._stores
+    assert 'Swap callback failing_callback failed' in caplog.text
+
+
+def test_retain_prunes_sidecars(tmp_path):
+    """Test that pruned snapshots are removed along with their lap store and partitions."""
+    snapshot_dir, db_file = tmp_path / 'snapshots', str(tmp_path / 'data.db')
+    paths = []
+    for name in ('first', 'second', 'third'):
+        path = build_snapshot(snapshot_dir, name)
+        stem = os.path.splitext(path)[0]
+        os.makedirs(f'{stem}.laps')
+        open(f'{stem}.laps/lap.npy', 'wb').close()
+        sqlite3.connect(f'{stem}.p2010.sqlite').close()
+        publish_snapshot(path, db_file, retain=2)
+        paths.append(path)
+
+    assert sorted(os.listdir(snapshot_dir)) == sorted(
+        os.path.basename(os.path.splitext(path)[0]) + suffix
+        for path in paths[1:] for suffix in ('.db', '.laps', '.p2010.sqlite')
+    )
+    assert os.path.realpath(db_file) == os.path.realpath(paths[-1])
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""Tests for the incrementally maintained championship standings."""
+import sqlite3
+
+import pytest
+
+from esm_fullstack_challenge.db import DB
+from esm_fullstack_challenge.db.partitions import build_partitions
+from esm_fullstack_challenge.db.standings import build_standings, get_race_standings
+
+
+@pytest.fixture
+def results_db(tmp_path):
+    """SQLite DB with one three-round season of results."""
+    db_file = str(tmp_path / 'data.db')
+    conn = sqlite3.connect(db_file)
+    conn.execute('CREATE TABLE races (id INTEGER, year INTEGER, round INTEGER, name TEXT);')
+    conn.execute(
+        'CREATE TABLE results (id INTEGER, race_id INTEGER, driver_id INTEGER, constructor_id INTEGER, '
+        'points REAL, position_order INTEGER);'
+    )
+    conn.executemany('INSERT INTO races VALUES (?, ?, ?, ?);', [(r, 2020, r, f'GP {r}') for r in (1, 2, 3)])
+    conn.executemany(
+        'INSERT INTO results VALUES (?, ?, ?, ?, ?, ?);',
+        [
+            (1, 1, 1, 1, 10, 1), (2, 1, 2, 1, 6, 2), (3, 1, 3, 2, 4, 3),
+            (4, 2, 2, 1, 10, 1), (5, 2, 3, 2, 6, 2), (6, 2, 1, 1, 4, 3),
+            (7, 3, 3, 2, 10, 1), (8, 3, 1, 1, 6, 2), (9, 3, 2, 1, 4, 3),
+        ]
+    )
+    conn.commit()
+    yield db_file, conn
+    conn.close()
+
+
+def standings(conn, kind, race_id):
+    return [tuple(row.values()) for row in get_race_standings(conn, kind, race_id)]
+
+
+def test_computed_matches_maintained(results_db):
+    """Test that on-the-fly and stored standings agree."""
+    _, conn = results_db
+    computed = [standings(conn, kind, r) for kind in ('drivers', 'constructors') for r in (1, 2, 3)]
+    build_standings(conn)
+    assert [standings(conn, kind, r) for kind in ('drivers', 'constructors') for r in (1, 2, 3)] == computed
+    assert standings(conn, 'drivers', 2) == [(2, 16.0, 1, 1), (1, 14.0, 1, 2), (3, 10.0, 0, 3)]
+    assert standings(conn, 'constructors', 3) == [(1, 40.0, 2, 1), (2, 20.0, 1, 2)]
+
+
+def test_incremental_update(results_db):
+    """Test that changing a race's results updates that round onwards only."""
+    _, conn = results_db
+    build_standings(conn)
+    conn.execute('UPDATE results SET points = 30 WHERE race_id = 2 AND driver_id = 3;')
+    conn.commit()
+    assert conn.execute('SELECT race_id FROM _standings_dirty;').fetchall() == [(2,)]
+
+    assert standings(conn, 'drivers', 1) == [(1, 10.0, 1, 1), (2, 6.0, 0, 2), (3, 4.0, 0, 3)]
+    assert standings(conn, 'drivers', 3)[0] == (3, 44.0, 1, 1)
+    assert conn.execute('SELECT count(*) FROM _standings_dirty;').fetchone() == (0,)
+
+
+def test_read_only_falls_back_to_computed(results_db):
+    """Test that pending changes are computed on the fly on a read-only database."""
+    db_file, conn = results_db
+    build_standings(conn)
+    conn.execute('UPDATE results SET points = 30 WHERE race_id = 2 AND driver_id = 3;')
+    conn.commit()
+
+    ro_conn = sqlite3.connect(f'file:{db_file}?mode=ro', uri=True)
+    assert standings(ro_conn, 'drivers', 2)[0] == (3, 34.0, 0, 1)
+    ro_conn.close()
+    assert conn.execute('SELECT count(*) FROM _standings_dirty;').fetchone() == (1,)
+
+
+def test_partitioned_results_update_standings(results_db):
+    """Test that writes to partitioned results still mark and update the standings."""
+    db_file, conn = results_db
+    build_standings(conn)
+    conn.execute('INSERT INTO _standings_dirty VALUES (3);')
+    conn.commit()
+    build_partitions(conn, db_file)
+    assert conn.execute('SELECT race_id FROM _standings_dirty;').fetchall() == [(3,)]
+
+    with DB(db_file).get_connection() as part_conn:
+        assert standings(part_conn, 'drivers', 2)[0] == (2, 16.0, 1, 1)
+        part_conn.execute('UPDATE results SET points = 30 WHERE race_id = 2 AND driver_id = 3;')
+        part_conn.commit()
+        assert part_conn.execute('SELECT race_id FROM _standings_dirty;').fetchall() == [(2,), (3,)]
+        assert standings(part_conn, 'drivers', 2)[0] == (3, 34.0, 0, 1)
+        assert part_conn.execute('SELECT count(*) FROM _standings_dirty;').fetchone() == (0,)
+
+
+def test_ties_broken_by_countback(results_db):
+    """Test that competitors level on points are ordered by their best finishes, with distinct positions."""
+    _, conn = results_db
+    conn.execute('UPDATE results SET points = 5, position_order = 5 - driver_id WHERE race_id = 1 AND driver_id > 1;')
+    computed = standings(conn, 'drivers', 1)
+    assert computed == [(1, 10.0, 1, 1), (3, 5.0, 0, 2), (2, 5.0, 0, 3)]
+    build_standings(conn)
+    assert standings(conn, 'drivers', 1) == computed
+    assert [row[3] for row in standings(conn, 'constructors', 1)] == [1, 2]
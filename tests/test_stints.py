@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""Tests for the vectorized stint analysis."""
+import sqlite3
+
+import numpy as np
+import pytest
+
+from esm_fullstack_challenge.db.lapstore import LapStore, export_lap_store
+from esm_fullstack_challenge.db.stints import compute_stints, read_laps
+
+
+def make_race(race_id, lap_times, pit_laps):
+    """Laps and pit stops arrays for one race from {driver_id: [lap ms, ...]} and {driver_id: [pit lap, ...]}."""
+    laps = [(race_id, driver_id, lap, ms)
+            for driver_id, times in sorted(lap_times.items()) for lap, ms in enumerate(times, start=1)]
+    stops = [(race_id, driver_id, stop, lap, 2000)
+             for driver_id, pits in sorted(pit_laps.items()) for stop, lap in enumerate(pits, start=1)]
+    laps = np.array(laps, dtype=np.int64).reshape(-1, 4)
+    stops = np.array(stops, dtype=np.int64).reshape(-1, 5)
+    return (
+        {column: laps[:, i] for i, column in enumerate(('race_id', 'driver_id', 'lap', 'milliseconds'))},
+        {column: stops[:, i] for i, column in enumerate(('race_id', 'driver_id', 'stop', 'lap', 'milliseconds'))},
+    )
+
+
+def test_stints():
+    """Test stint boundaries, pace, degradation and pit loss against hand-computed values."""
+    laps, pit_stops = make_race(1, {
+        # Lap 1 and the in-/out-laps (4, 5) are excluded from pace, as is the 200000 ms lap.
+        7: [99000, 90000, 90100, 110000, 108000, 89000, 89200, 89400, 200000, 89600],
+        9: [95000, 91000, 91000, 91000],
+    }, {7: [4]})
+    stints, stops = compute_stints(laps, pit_stops)
+
+    assert [(s['driver_id'], s['stint'], s['start_lap'], s['end_lap'], s['laps'], s['clean_laps']) for s in stints] \
+        == [(7, 1, 1, 4, 4, 2), (7, 2, 5, 10, 6, 4), (9, 1, 1, 4, 4, 3)]
+    assert stints[0]['mean_ms'] == 90050.0 and stints[0]['degradation_ms_per_lap'] is None
+    assert stints[1]['median_ms'] == pytest.approx(89300.0)
+    assert stints[1]['degradation_ms_per_lap'] == pytest.approx(1300 / 8.75, abs=0.1)
+    assert stints[2]['degradation_ms_per_lap'] == 0.0
+
+    driver_median = np.median([90000, 90100, 89000, 89200, 89400, 89600])
+    assert stops == [{
+        'race_id': 1, 'driver_id': 7, 'stop': 1, 'lap': 4, 'duration_ms': 2000.0,
+        'pit_loss_ms': pytest.approx(110000 + 108000 - 2 * driver_median),
+    }]
+
+
+def test_season_batch_matches_single_races():
+    """Test that several races computed together give the same stints as one at a time."""
+    races = [
+        make_race(race_id, {d: [95000 + 10 * lap + d + race_id for lap in range(12)] for d in (1, 2, 3)},
+                  {d: [3 + d + race_id % 3] for d in (1, 2)})
+        for race_id in (5, 6, 8)
+    ]
+    laps = {key: np.concatenate([race[0][key] for race in races]) for key in races[0][0]}
+    pit_stops = {key: np.concatenate([race[1][key] for race in races]) for key in races[0][1]}
+
+    single = [compute_stints(*race) for race in races]
+    assert compute_stints(laps, pit_stops) == (
+        [s for stints, _ in single for s in stints],
+        [p for _, stops in single for p in stops],
+    )
+
+
+def test_pit_stops_without_laps():
+    """Test that pit stops are returned without pit loss for races that have no laps."""
+    laps, pit_stops = make_race(3, {}, {4: [12, 30]})
+    assert compute_stints(laps, pit_stops) == ([], [
+        {'race_id': 3, 'driver_id': 4, 'stop': 1, 'lap': 12, 'duration_ms': 2000.0, 'pit_loss_ms': None},
+        {'race_id': 3, 'driver_id': 4, 'stop': 2, 'lap': 30, 'duration_ms': 2000.0, 'pit_loss_ms': None},
+    ])
+
+
+def test_races_missing_from_store_read_from_sqlite(tmp_path):
+    """Test that races added after the lap store was exported are read from SQLite."""
+    db_file = str(tmp_path / 'data.db')
+    conn = sqlite3.connect(db_file)
+    conn.execute('CREATE TABLE lap_times (race_id INTEGER, driver_id INTEGER, lap INTEGER, '
+                 'position INTEGER, milliseconds INTEGER);')
+    insert = 'INSERT INTO lap_times VALUES (?, ?, ?, 1, ?);'
+    conn.executemany(insert, [(r, d, lap, 90000 + lap) for r in (1, 3) for d in (2, 1) for lap in (1, 2)])
+    store = LapStore(export_lap_store(conn, db_file))
+    conn.executemany(insert, [(2, d, lap, 80000 + lap) for d in (5, 4) for lap in (2, 1)])
+
+    laps = read_laps(conn, [3, 2, 1], store)
+    expected = read_laps(conn, [1, 2, 3])
+    assert list(laps['race_id']) == [1] * 4 + [2] * 4 + [3] * 4
+    for column in expected:
+        np.testing.assert_array_equal(laps[column], expected[column])
+    conn.close()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+"""Tests for the live race event feed."""
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from esm_fullstack_challenge.db import DB
+from esm_fullstack_challenge import streams
+from esm_fullstack_challenge.streams import RaceFeed, _feeds, format_event, race_events, read_race_updates
+
+
+@pytest.fixture
+def db(tmp_path):
+    """SQLite DB with two laps of one race."""
+    db_file = str(tmp_path / 'race.db')
+    conn = sqlite3.connect(db_file)
+    conn.execute('CREATE TABLE races (id INTEGER, year INTEGER);')
+    conn.execute('CREATE TABLE lap_times (race_id INTEGER, driver_id INTEGER, lap INTEGER, '
+                 'position INTEGER, time TEXT, milliseconds INTEGER);')
+    conn.execute('CREATE TABLE pit_stops (race_id INTEGER, driver_id INTEGER, stop INTEGER, lap INTEGER, '
+                 'time TEXT, duration TEXT, milliseconds INTEGER);')
+    conn.execute('INSERT INTO races VALUES (1, 2020);')
+    conn.executemany(
+        'INSERT INTO lap_times VALUES (?, ?, ?, ?, NULL, ?);',
+        [(1, driver_id, lap, driver_id, 90000) for lap in (1, 2) for driver_id in (1, 2)]
+    )
+    conn.commit()
+    conn.close()
+    return DB(db_file)
+
+
+def test_read_race_updates(db):
+    """Test that rows are grouped by lap from the requested lap on."""
+    with db.get_connection() as conn:
+        updates = read_race_updates(conn, 1, from_lap=2)
+    assert list(updates) == [2]
+    assert [row['driver_id'] for row in updates[2]['lap_times']] == [1, 2]
+    assert format_event(2, updates[2]).startswith('id: 2\nevent: lap\ndata: {"lap": 2, "lap_times": [')
+
+
+def test_feed_publishes_new_rows_only(db):
+    """Test that polls after the first return only rows committed since the previous one."""
+    async def scenario():
+        feed = RaceFeed(1, lambda: db)
+        assert feed.poll() == {}
+        assert feed.poll() == {}
+
+        with db.get_connection() as conn:
+            conn.execute("INSERT INTO lap_times VALUES (1, 1, 3, 1, NULL, 89000);")
+            conn.execute("INSERT INTO pit_stops VALUES (1, 2, 1, 2, NULL, '22.0', 22000);")
+        updates = feed.poll()
+        assert updates[3]['lap_times'] == [{'driver_id': 1, 'lap': 3, 'position': 1, 'milliseconds': 89000}]
+        assert updates[2] == {
+            'lap_times': [],
+            'pit_stops': [{'driver_id': 2, 'stop': 1, 'lap': 2, 'duration': '22.0', 'milliseconds': 22000}],
+        }
+        assert feed.poll() == {}
+        feed.close()
+
+    asyncio.run(scenario())
+
+
+def test_backlog_follows_first_poll(db):
+    """Test that the backlog is read after the feed's first poll and the feed is dropped with its last stream."""
+    async def scenario():
+        feed_ready = []
+
+        def get_db():
+            feed_ready.append(_feeds[1].ready.is_set())
+            return db
+
+        events = race_events(1, 1, get_db, interval=10)
+        assert await anext(events) == 'retry: 3000\n\n'
+        assert [(await anext(events)).split('\n')[0] for _ in range(2)] == ['id: 1', 'id: 2']
+        assert feed_ready == [False, True]
+
+        await events.aclose()
+        assert 1 not in _feeds
+
+    asyncio.run(scenario())
+
+
+def test_failing_polls_end_stream(db, monkeypatch):
+    """Test that a feed whose polls keep failing ends its streams with an error event."""
+    monkeypatch.setattr(streams, 'MAX_POLL_FAILURES', 2)
+    attempts = []
+
+    def get_db():
+        attempts.append(1)
+        raise sqlite3.OperationalError('unable to open database file')
+
+    async def scenario():
+        events = race_events(1, 0, get_db, interval=0, heartbeat=10)
+        assert await anext(events) == 'retry: 3000\n\n'
+        assert await anext(events) == 'event: error\ndata: {"detail": "Race updates are unavailable."}\n\n'
+        with pytest.raises(StopAsyncIteration):
+            await anext(events)
+        assert 1 not in _feeds
+
+    asyncio.run(scenario())
+    assert len(attempts) == 2
+
+
+def test_connection_closed_after_in_flight_poll(db):
+    """Test that dropping a feed during a poll closes its connection only once that poll finished."""
+    polling, release, calls = threading.Event(), threading.Event(), []
+
+    class SlowFeed(RaceFeed):
+        def poll(self):
+            updates = super().poll()
+            polling.set()
+            release.wait(5)
+            calls.append(('poll', self._conn.execute('SELECT count(*) FROM lap_times;').fetchone()[0]))
+            return updates
+
+        def close(self):
+            if self._conn is not None:
+                calls.append(('close', self._conn.in_transaction))
+            super().close()
+
+    async def scenario():
+        feed = _feeds[1] = SlowFeed(1, lambda: db, interval=0)
+        queue = feed.subscribe()
+        await asyncio.to_thread(polling.wait, 5)
+        feed.unsubscribe(queue)
+        await asyncio.sleep(0)
+        assert calls == []
+
+        release.set()
+        while len(calls) < 2:
+            await asyncio.sleep(0.01)
+        assert feed._conn is None
+
+    asyncio.run(scenario())
+    assert calls == [('poll', 4), ('close', False)]
+
+
+@pytest.fixture
+def stream_client(client, db, monkeypatch):
+    """Client whose race streams read `db` and end after the backlog of laps 1 and 2, as the test client
+    only returns once the response is complete."""
+    async def backlog_events(race_id, from_lap, get_db, **kwargs):
+        events = race_events(race_id, from_lap, get_db, **kwargs)
+        try:
+            async for event in events:
+                yield event
+                if event.startswith('id: 2\n'):
+                    return
+        finally:
+            await events.aclose()
+
+    monkeypatch.setattr('esm_fullstack_challenge.routers.races.get_stream_db', lambda: db)
+    monkeypatch.setattr('esm_fullstack_challenge.routers.races.race_events', backlog_events)
+    return client
+
+
+def test_stream_unknown_race(stream_client):
+    """Test that streaming a race that does not exist is a 404."""
+    response = stream_client.get('/races/99/stream')
+    assert response.status_code == 404
+    assert response.json() == {'detail': 'Race not found.'}
+
+
+@pytest.mark.parametrize('kwargs, first_lap', [
+    ({}, 1),
+    ({'headers': {'Last-Event-ID': '2'}}, 2),
+    ({'headers': {'Last-Event-ID': 'bogus'}}, 1),
+    ({'params': {'last_lap': 2}}, 2),
+    ({'params': {'last_lap': 2}, 'headers': {'Last-Event-ID': '1'}}, 2),
+])
+def test_stream_resumes_from_last_lap(stream_client, kwargs, first_lap):
+    """Test that streams start from the lap given by `?last_lap=`, else by `Last-Event-ID`, else the first."""
+    response = stream_client.get('/races/1/stream', **kwargs)
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/event-stream')
+    assert [int(line[len('id: '):]) for line in response.text.split('\n') if line.startswith('id: ')] \
+        == list(range(first_lap, 3))
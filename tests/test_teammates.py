@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""Tests for the teammate head-to-head pairs."""
+import sqlite3
+
+import pytest
+
+from esm_fullstack_challenge.db.teammates import build_teammate_pairs, get_head_to_head
+
+
+@pytest.fixture
+def conn():
+    """In-memory DB with two seasons of a two-driver team."""
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE races (id INTEGER, year INTEGER, round INTEGER);')
+    conn.execute(
+        'CREATE TABLE results (race_id INTEGER, driver_id INTEGER, constructor_id INTEGER, '
+        'position TEXT, position_order INTEGER, points REAL);'
+    )
+    conn.execute('CREATE TABLE qualifying (race_id INTEGER, driver_id INTEGER, position INTEGER);')
+    conn.executemany('INSERT INTO races VALUES (?, ?, ?);', [(1, 2020, 1), (2, 2020, 2), (3, 2021, 1)])
+    conn.executemany(
+        'INSERT INTO results VALUES (?, ?, ?, ?, ?, ?);',
+        [
+            (1, 1, 1, '1', 1, 25), (1, 2, 1, '2', 2, 18), (1, 3, 2, '3', 3, 15),
+            (2, 1, 1, '\\N', 20, 0), (2, 2, 1, '1', 1, 25),
+            (3, 1, 1, '2', 2, 18), (3, 3, 1, '1', 1, 25),
+        ]
+    )
+    conn.executemany(
+        'INSERT INTO qualifying VALUES (?, ?, ?);',
+        [(1, 1, 2), (1, 2, 1), (2, 1, 1), (2, 2, 2), (3, 1, 1), (3, 3, 2)]
+    )
+    yield conn
+    conn.close()
+
+
+def test_head_to_head(conn):
+    """Test that precomputed and on-the-fly comparisons agree and count battles per season."""
+    computed = get_head_to_head(conn, 1)
+    build_teammate_pairs(conn)
+    assert get_head_to_head(conn, 1) == computed
+
+    season = get_head_to_head(conn, 1, teammate_id=2, year=2020)['seasons']
+    assert season == [{
+        'year': 2020, 'teammate_id': 2, 'races': 2,
+        'quali_ahead': 1, 'quali_behind': 1,
+        'race_ahead': 1, 'race_behind': 1,
+        'finish_ahead': 1, 'finish_behind': 0,
+        'points': 25.0, 'teammate_points': 43.0,
+    }]
+    assert [row['teammate_id'] for row in computed['career']] == [2, 3]
+    assert get_head_to_head(conn, 2)['career'][0]['race_ahead'] == 1